@@ -0,0 +1,62 @@
+"""Per-call Python overhead of helper lookups: legacy Query vs. cached select().
+
+The "legacy" column rebuilds the query on every call the way helpers.py
+used to; "cached" runs the module-level statements in booklib.helpers.
+
+Usage: python -m benchmarks.helpers_overhead --calls 20000
+"""
+import timeit
+
+import click
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from booklib import helpers
+from booklib.db.models import Base, Author, Book, Borrower
+
+
+def legacy_borrower(session, name):
+    return session.query(Borrower).filter_by(name=name).first()
+
+def legacy_book(session, title):
+    return session.query(Book).filter_by(title=title).first()
+
+def legacy_search(session, title):
+    return session.query(Book).join(Author).filter(
+        (Book.title.ilike(f"%{title}%")) |
+        (Book.genre.ilike(f"%{title}%")) |
+        (Author.name.ilike(f"%{title}%"))
+    ).all()
+
+
+@click.command()
+@click.option("--calls", type=int, default=20_000, help="Calls per measurement")
+def main(calls):
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        author = Author(name="Frank Herbert")
+        session.add_all([
+            Book(title="Dune", year=1965, genre="Sci-Fi", author=author),
+            Borrower(name="Mike", contacts="mike@example.com"),
+        ])
+        session.commit()
+
+        cases = (
+            ("borrower lookup", lambda: legacy_borrower(session, "Mike"),
+             lambda: helpers.find_borrower(session, "Mike")),
+            ("book lookup", lambda: legacy_book(session, "Dune"),
+             lambda: helpers.find_book(session, "Dune")),
+            ("search-book", lambda: legacy_search(session, "dune"),
+             lambda: list(helpers.search_book(session, "dune"))),
+        )
+        for label, legacy, cached in cases:
+            before = min(timeit.repeat(legacy, number=calls, repeat=3)) / calls * 1e6
+            after = min(timeit.repeat(cached, number=calls, repeat=3)) / calls * 1e6
+            click.echo(f"{label:>16}: legacy {before:7.1f} us/call | cached {after:7.1f} us/call "
+                       f"| {100 * (before - after) / before:4.1f}% less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Synthetic library databases for the benchmarks and tests/test_memory.py.
+
+Deterministic, so every run measures the same data.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from booklib.db.models import Base, Author, Book, Borrower, BorrowRecords
+
+GENRES = ("Sci-Fi", "Drama", "History")
+CHUNK = 50_000  # rows per INSERT, so a million-book library never sits in one list
+
+
+def build_library(path, books, loans=0, open_every=1):
+    '''Create a booklib database at path and return its engine.
+
+    There are books // 10 + 1 authors and borrowers. Loan i is for book
+    1 + i % books and borrower 1 + i % borrowers, borrowed i % 365 days ago.
+    The first pass over the books (i < books) leaves every open_every-th
+    loan open and its book unavailable; every other loan is returned.'''
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(engine)
+    people = books // 10 + 1
+    now = datetime.now()
+
+    def on_loan(i):
+        return i < min(loans, books) and i % open_every == 0
+
+    with engine.begin() as conn:
+        conn.execute(insert(Author), [{"id": i, "name": f"Author {i}"} for i in range(1, people + 1)])
+        conn.execute(insert(Borrower), [{"id": i, "name": f"Borrower {i}", "contacts": "x"} for i in range(1, people + 1)])
+        for start in range(0, books, CHUNK):
+            conn.execute(insert(Book), [
+                {"id": i + 1, "title": f"Book {i + 1}", "year": 1900 + i % 120, "genre": GENRES[i % len(GENRES)],
+                 "available": not on_loan(i), "author_id": 1 + i % people}
+                for i in range(start, min(start + CHUNK, books))
+            ])
+        for start in range(0, loans, CHUNK):
+            rows = []
+            for i in range(start, min(start + CHUNK, loans)):
+                borrowed = now - timedelta(days=i % 365)
+                rows.append({"book_id": 1 + i % books, "borrower_id": 1 + i % people, "borrow_date": borrowed,
+                             "return_date": None if on_loan(i) else min(borrowed + timedelta(days=7), now)})
+            conn.execute(insert(BorrowRecords), rows)
+    return engine
@@ -0,0 +1,43 @@
+"""Per-call overhead of the metrics wrapper around commands and helpers.
+
+Usage: python -m benchmarks.metrics_overhead --calls 1000000
+"""
+import timeit
+
+import click
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from booklib import helpers, metrics
+from booklib.db.models import Base, Author, Book
+
+
+def noop(session, title):
+    return None
+
+
+@click.command()
+@click.option("--calls", type=int, default=1_000_000, help="Calls per measurement")
+def main(calls):
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add(Book(title="Dune", year=1965, genre="Sci-Fi", author=Author(name="Frank Herbert")))
+        session.commit()
+
+        timed_noop = metrics.timed("helper", "noop")(noop)
+        timed_find = metrics.timed("helper", "find_book")(helpers.find_book)
+        cases = (
+            ("empty function", noop, timed_noop, calls),
+            ("find_book", helpers.find_book, timed_find, max(calls // 100, 1)),
+        )
+        for label, bare, wrapped, n in cases:
+            # best of 5 to keep scheduler noise out of a sub-microsecond difference
+            plain = min(timeit.repeat(lambda: bare(session, "Dune"), number=n, repeat=5)) / n * 1e6
+            timed = min(timeit.repeat(lambda: wrapped(session, "Dune"), number=n, repeat=5)) / n * 1e6
+            click.echo(f"{label:>15}: bare {plain:8.3f} us/call | timed {timed:8.3f} us/call | overhead {timed - plain:6.3f} us")
+
+
+if __name__ == "__main__":
+    main()
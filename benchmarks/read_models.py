@@ -0,0 +1,45 @@
+"""Per-row overhead of ORM objects vs. read models on list_books.
+
+Usage: python -m benchmarks.read_models --rows 1000000
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import click
+from sqlalchemy.orm import sessionmaker
+
+from booklib import helpers
+
+from .library import build_library
+
+
+def measure(Session, rows):
+    with Session() as session:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = list(helpers.list_books(session, rows=rows))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(result), elapsed, peak
+
+
+@click.command()
+@click.option("--rows", type=int, default=1_000_000, help="Number of books to load")
+def main(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_library(os.path.join(tmp, "bench.db"), rows)
+        Session = sessionmaker(bind=engine)
+        for label, use_rows in (("ORM Book", False), ("BookRow", True)):
+            count, elapsed, peak = measure(Session, use_rows)
+            click.echo(
+                f"{label:>9}: {count} rows | {elapsed:.2f}s ({count / elapsed:,.0f} rows/s) | "
+                f"peak {peak / 2**20:.1f} MiB ({peak / count:.0f} B/row)"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Read latency of helpers on the on-disk database vs. the in-memory replica.
+
+Usage: python -m benchmarks.replica --books 100000 --calls 20
+"""
+import os
+import tempfile
+import time
+
+import click
+from sqlalchemy.orm import sessionmaker
+
+from booklib import helpers
+from booklib.db.replica import Replica
+
+from .library import build_library
+
+
+def timed(Session, fn, calls):
+    with Session() as session:
+        fn(session)  # warm up
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn(session)
+        return (time.perf_counter() - start) / calls * 1000
+
+
+@click.command()
+@click.option("--books", type=int, default=100_000, help="Books in the synthetic library")
+@click.option("--calls", type=int, default=20, help="Calls per measurement")
+def main(books, calls):
+    cases = (
+        ("search_book", lambda s: list(helpers.search_book(s, "book 12", rows=True))),
+        ("list_authors", lambda s: list(helpers.list_authors(s, rows=True))),
+        ("top_authors", lambda s: helpers.top_authors(s, 10, rows=True)),
+        ("top_borrower", lambda s: helpers.top_borrower(s, 10, rows=True)),
+        ("late_returns", lambda s: list(helpers.late_returns(s, days=30, rows=True))),
+        ("borrowed_books", lambda s: list(helpers.get_borrowed_books(s, rows=True))),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        disk = build_library(path, books, loans=books * 2, open_every=10)
+        DiskSession = sessionmaker(bind=disk)
+        start = time.perf_counter()
+        replica = Replica(path)
+        click.echo(f"Replica loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for label, fn in cases:
+            on_disk = timed(DiskSession, fn, calls)
+            in_memory = timed(replica.session, fn, calls)
+            click.echo(f"{label:>14}: disk {on_disk:8.2f} ms | replica {in_memory:8.2f} ms | {on_disk / in_memory:4.2f}x")
+        replica.close()
+        disk.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import time
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for --compress zstd
+    zstandard = None
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+DELTA_MAGIC = b"BOOKLIB-DELTA1\n"
+_PAGE_HEADER = struct.Struct(">I")
+_DELTA_HEADER = struct.Struct(">II")
+_CHUNK = 1 << 20
+
+
+_MAGIC = ((b"\x1f\x8b", "gzip"), (b"\x28\xb5\x2f\xfd", "zstd"))
+
+
+def detect_compression(path):
+    '''Compression of an existing file, from its magic bytes (not its name).'''
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return "none"
+
+def _check_compression(compression):
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression needs the 'zstandard' package")
+
+def _open(path, mode, compression):
+    '''Open a file for binary streaming, compressed or not.'''
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "zstd":
+        _check_compression(compression)
+        raw = open(path, mode)
+        if "w" in mode:
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return open(path, mode)
+
+def _copy_stream(src_path, src_compression, dest_path, dest_compression):
+    with _open(src_path, "rb", src_compression) as src, _open(dest_path, "wb", dest_compression) as dest:
+        shutil.copyfileobj(src, dest, _CHUNK)
+
+def _read_exact(stream, size):
+    '''read() that keeps going until size bytes or EOF (zstd readers return short reads).'''
+    data = stream.read(size)
+    while data and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+def _temp_path(near):
+    fd, path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(os.path.abspath(near)))
+    os.close(fd)
+    return path
+
+
+def quick_check(path):
+    '''Runs PRAGMA quick_check; returns a list of problems (empty when ok).'''
+    conn = sqlite3.connect(path)
+    try:
+        rows = [r[0] for r in conn.execute("PRAGMA quick_check")]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+def online_copy(source_path, dest_path, pages=256, sleep=0.05, progress=None):
+    '''Copy a live database with the SQLite online backup API.
+
+    Copies `pages` pages per step and sleeps `sleep` seconds between steps,
+    so other connections keep reading and writing while it runs.
+    Returns (bytes copied, seconds).'''
+    src = sqlite3.connect(source_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        page_size = src.execute("PRAGMA page_size").fetchone()[0]
+        on_step = None
+        if progress:
+            def on_step(status, remaining, total):
+                progress(total - remaining, total)
+        start = time.perf_counter()
+        src.backup(dest, pages=pages, progress=on_step, sleep=sleep)
+        elapsed = time.perf_counter() - start
+        page_count = dest.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        dest.close()
+        src.close()
+    return page_count * page_size, elapsed
+
+
+def backup_database(source_path, dest_path, pages=256, sleep=0.05, compression="none", progress=None):
+    '''backup <dest> → Online snapshot of the database, checked and optionally compressed.'''
+    _check_compression(compression)
+    snapshot = dest_path if compression == "none" else _temp_path(dest_path)
+    try:
+        size, elapsed = online_copy(source_path, snapshot, pages, sleep, progress)
+        problems = quick_check(snapshot)
+        if problems:
+            raise ValueError(f"Backup failed integrity check: {problems[0]}")
+        if compression != "none":
+            _copy_stream(snapshot, "none", dest_path, compression)
+    finally:
+        if snapshot != dest_path and os.path.exists(snapshot):
+            os.remove(snapshot)
+    return size, elapsed
+
+
+def _write_delta(db_path, base_path, dest_path, compression, page_size, page_count):
+    '''Write the pages of db_path that differ from base_path; returns how many.'''
+    changed = 0
+    with open(db_path, "rb") as new, open(base_path, "rb") as base, \
+            _open(dest_path, "wb", compression) as out:
+        out.write(DELTA_MAGIC)
+        out.write(_DELTA_HEADER.pack(page_size, page_count))
+        for pgno in range(page_count):
+            page = new.read(page_size)
+            if page != base.read(page_size):
+                out.write(_PAGE_HEADER.pack(pgno))
+                out.write(page)
+                changed += 1
+    return changed
+
+
+def backup_delta(source_path, base_path, dest_path, pages=256, sleep=0.05, compression="none", progress=None):
+    '''backup --incremental <base> → Store only the pages that differ from a full snapshot.
+
+    `base_path` must be an uncompressed full backup. Each delta is taken
+    against the same base, so a restore needs the base plus one delta.
+    The live database is snapshotted stepwise like a full backup (so
+    writers are never held up for more than one step) and the snapshot
+    is diffed against the base.
+    Returns (bytes copied, seconds, changed pages).'''
+    _check_compression(compression)
+    if detect_compression(base_path) != "none":
+        raise ValueError("Incremental backups need an uncompressed base")
+    snapshot = _temp_path(dest_path)
+    try:
+        size, elapsed = online_copy(source_path, snapshot, pages, sleep, progress)
+        problems = quick_check(snapshot)
+        if problems:
+            raise ValueError(f"Backup failed integrity check: {problems[0]}")
+        conn = sqlite3.connect(snapshot)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.close()
+        changed = _write_delta(snapshot, base_path, dest_path, compression, page_size, page_count)
+    finally:
+        os.remove(snapshot)
+    return size, elapsed, changed
+
+def apply_delta(base_path, delta_path, dest_path):
+    '''Rebuild a full database file at dest_path from a base and one delta.'''
+    shutil.copyfile(base_path, dest_path)
+    with _open(delta_path, "rb", detect_compression(delta_path)) as delta, open(dest_path, "r+b") as out:
+        if _read_exact(delta, len(DELTA_MAGIC)) != DELTA_MAGIC:
+            raise ValueError(f"'{delta_path}' is not a booklib delta")
+        page_size, page_count = _DELTA_HEADER.unpack(_read_exact(delta, _DELTA_HEADER.size))
+        while True:
+            header = _read_exact(delta, _PAGE_HEADER.size)
+            if not header:
+                break
+            (pgno,) = _PAGE_HEADER.unpack(header)
+            out.seek(pgno * page_size)
+            out.write(_read_exact(delta, page_size))
+        out.truncate(page_count * page_size)
+
+
+def restore_database(backup_path, target_path, delta_path=None, pages=256, sleep=0.05, progress=None):
+    '''restore <backup> → Check a backup and copy it into the live database.
+
+    Uses the online backup API in the other direction, so open
+    connections see the restored data on their next transaction.'''
+    compression = detect_compression(backup_path)
+    staged = None
+    try:
+        if delta_path:
+            if compression != "none":
+                raise ValueError("Incremental restore needs an uncompressed base")
+            staged = _temp_path(target_path)
+            apply_delta(backup_path, delta_path, staged)
+        elif compression != "none":
+            staged = _temp_path(target_path)
+            _copy_stream(backup_path, compression, staged, "none")
+        source = staged or backup_path
+        problems = quick_check(source)
+        if problems:
+            raise ValueError(f"Backup failed integrity check: {problems[0]}")
+        return online_copy(source, target_path, pages, sleep, progress)
+    finally:
+        if staged and os.path.exists(staged):
+            os.remove(staged)
@@ -0,0 +1,92 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, func, bindparam
+from .db.models import Change
+
+# Change feed: triggers on books, borrowers and borrow_records append to
+# the changes table, and changes.id is the cursor consumers resume from.
+
+_since = (
+    select(Change.id, Change.table_name, Change.op, Change.row_id, Change.data, Change.changed_at)
+    .where(Change.id > bindparam("cursor"))
+    .order_by(Change.id)
+    .limit(bindparam("batch_size"))
+)
+
+# Oldest batch_size changes (PK order) that are old enough to drop
+_oldest = (
+    select(Change.id)
+    .order_by(Change.id)
+    .limit(bindparam("batch_size"))
+    .subquery()
+)
+_truncate = delete(Change).where(
+    Change.id.in_(
+        select(_oldest.c.id)
+        .join(Change, Change.id == _oldest.c.id)
+        .where(Change.id <= bindparam("upto"), Change.changed_at < bindparam("cutoff"))
+    )
+)
+
+
+def latest_cursor(session):
+    '''Cursor of the newest change, 0 when the feed is empty.'''
+    return session.scalar(select(func.max(Change.id))) or 0
+
+def fetch_changes(conn, cursor, batch_size=500):
+    '''Changes after cursor, oldest first, as JSON-ready dicts.'''
+    return [
+        {
+            "cursor": change_id,
+            "table": table_name,
+            "op": op,
+            "id": row_id,
+            "data": json.loads(data) if data else None,
+            "at": str(changed_at),
+        }
+        for change_id, table_name, op, row_id, data, changed_at
+        in conn.execute(_since, {"cursor": cursor, "batch_size": batch_size})
+    ]
+
+def watch(engine, cursor=0, follow=False, interval=1.0, batch_size=500):
+    '''watch → Yield changes after cursor; with follow=True keep tailing.
+
+    Between polls it only reads PRAGMA data_version, which changes when
+    another connection commits, so an idle feed costs one pragma per
+    interval instead of a query on changes.'''
+    with engine.connect() as conn:
+        while True:
+            version = conn.exec_driver_sql("PRAGMA data_version").scalar()
+            batch = fetch_changes(conn, cursor, batch_size)
+            conn.commit()  # end the read so the next poll sees new commits
+            for change in batch:
+                yield change
+            if batch:
+                cursor = batch[-1]["cursor"]
+                if len(batch) == batch_size:
+                    continue
+            if not follow:
+                return
+            while conn.exec_driver_sql("PRAGMA data_version").scalar() == version:
+                conn.commit()
+                time.sleep(interval)
+
+def truncate_changes(session, upto=None, older_than_days=None, batch_size=5000):
+    '''truncate-changes → Delete consumed changes in bounded batches.
+
+    Deletes changes with id <= upto and/or older than older_than_days,
+    batch_size rows per transaction, oldest first. Returns rows deleted.'''
+    params = {
+        "upto": upto if upto is not None else latest_cursor(session),
+        "cutoff": datetime.utcnow() - timedelta(days=older_than_days) if older_than_days is not None else datetime.max,
+        "batch_size": batch_size,
+    }
+    deleted = 0
+    while True:
+        count = session.execute(_truncate, params, execution_options={"synchronize_session": False}).rowcount
+        session.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
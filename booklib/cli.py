@@ -1,8 +1,14 @@
+import atexit
+import sys
 import click
+import json
+from contextlib import contextmanager
+from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
-from booklib.db.database import SessionLocal
-from booklib import helpers
-from booklib.db.models import Borrower, Book
+from booklib.db.database import SessionLocal, engine
+from booklib.db.replica import Replica
+from booklib import helpers, backup, dedupe, recommend, changes, metrics, federation, memory
+from booklib.db.models import Book
 
 logo = '''
 ██████   ██████   ██████  ██   ██ ██      ██ ██ ██████  
@@ -14,13 +20,66 @@ logo = '''
                     BOOKLIB CLI
 '''
 
+# Commands whose stdout is parsed by other programs, so no logo
+MACHINE_COMMANDS = {"watch", "metrics"}
+
 @click.group(invoke_without_command=True)
+@click.option("--memory-report", is_flag=True, help="Print peak memory and top allocation sites to stderr")
 @click.pass_context
-def cli(ctx):
+def cli(ctx, memory_report):
     """BookLib CLI – manage your books and borrowers."""
-    click.echo(logo)
+    if ctx.invoked_subcommand not in MACHINE_COMMANDS:
+        click.echo(logo)
     if ctx.invoked_subcommand is None:
         click.echo(ctx.get_help())
+    if memory_report:
+        memory.watch_module(helpers)
+        memory.start()
+        ctx.call_on_close(lambda: _echo_memory_report(ctx.invoked_subcommand))
+
+
+def _echo_memory_report(command):
+    peak, sampled, sites = memory.stop()
+    click.echo(f"Memory report for {command}: peak {peak / 2**20:.2f} MiB", err=True)
+    if sites:
+        click.echo(f"Top allocation sites at the largest sample ({sampled / 2**20:.2f} MiB traced):", err=True)
+        for size, blocks, where in sites:
+            click.echo(f"  {size / 2**10:10.1f} KiB {blocks:8d} blocks  {where}", err=True)
+
+
+def _echo_each(rows, line, empty=None, echo=click.echo):
+    """Echo line(row) for each row as it streams in, or empty if there were none."""
+    count = 0
+    for count, row in enumerate(rows, 1):
+        echo(line(row))
+    if not count and empty:
+        echo(empty)
+    return count
+
+
+# Federation across branch databases (see booklib/federation.py)
+def _parse_branches(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        return federation.select_branches(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+branches_option = click.option(
+    "--branches", callback=_parse_branches,
+    help=f'Query branch databases from {federation.BRANCHES_FILE}: "all" or names separated by commas',
+)
+
+def _federated(branches, query):
+    """Yield (branch, rows) as branches finish, echoing per-branch timing to stderr."""
+    for branch, rows, seconds, error in federation.fan_out(branches, query):
+        if error:
+            # DBAPI errors carry the useful message on .orig
+            click.echo(f"[{branch}] failed after {seconds * 1000:.1f} ms: {getattr(error, 'orig', error)}", err=True)
+            continue
+        click.echo(f"[{branch}] {len(rows)} rows in {seconds * 1000:.1f} ms", err=True)
+        yield branch, rows
 
 
 # Click commands to be used when arguments passed
@@ -46,34 +105,55 @@ def list_books_command():
     """List all books."""
     try:
         with SessionLocal() as session:
-            books = helpers.list_books(session)
-            if not books:
-                click.echo("No books found.")
-            else:
-                for book in books:
-                    click.echo(f"{book.id}: {book.title} by {book.author.name}")
+            _echo_each(helpers.list_books(session, rows=True),
+                       lambda book: f"{book.id}: {book.title} by {book.author_name}", "No books found.")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
 
 
 @cli.command("search-book")
 @click.argument("query")
-def search_book_command(query):
+@branches_option
+def search_book_command(query, branches):
     """Search books by title, author, or genre."""
+    if branches:
+        for branch, results in _federated(branches, lambda s: helpers.search_book(s, query, rows=True)):
+            for b in results:
+                status = "available" if b.available else "on loan"
+                click.echo(f"[{branch}] {b.id}: {b.title} by {b.author_name} ({status})")
+        return
     with SessionLocal() as session:
-        results = helpers.search_book(session, query)
-        for b in results:
-            click.echo(f"{b.id}: {b.title} by {b.author.name}")
+        _echo_each(helpers.search_book(session, query, rows=True), lambda b: f"{b.id}: {b.title} by {b.author_name}")
 
 
 @cli.command("delete-book")
 @click.argument("book_id", type=int)
 def delete_book_command(book_id):
     """Delete a book by ID."""
-    with SessionLocal() as session:
-        helpers.delete_book(session, book_id)
-        session.commit()
-        click.echo("Book deleted.")
+    try:
+        with SessionLocal() as session:
+            helpers.delete_book(session, book_id)
+            click.echo("Book deleted.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("delete-books")
+@click.argument("book_ids", nargs=-1, type=int)
+@click.option("--genre", help="Only books in this genre")
+@click.option("--year-from", type=int, help="Only books published in or after this year")
+@click.option("--year-to", type=int, help="Only books published in or before this year")
+@click.option("--chunk-size", type=int, default=500, help="Books deleted per transaction")
+def delete_books_command(book_ids, genre, year_from, year_to, chunk_size):
+    """Delete many books by ID and/or filters; books on loan are kept."""
+    try:
+        with SessionLocal() as session:
+            deleted, refused = helpers.delete_books(session, book_ids, genre, year_from, year_to, chunk_size)
+            click.echo(f"Deleted {deleted} books.")
+            if refused:
+                click.echo(f"Kept {refused} books that are on loan.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
 
 
 @cli.command("update-book")
@@ -103,9 +183,7 @@ def add_author_command(name, birth, country):
 def list_authors_command():
     """List authors"""
     with SessionLocal() as session:
-        authors = helpers.list_authors(session)
-        for a, count in authors:
-            click.echo(f"{a.name} ({count} books)")
+        _echo_each(helpers.list_authors(session, rows=True), lambda entry: f"{entry[0].name} ({entry[1]} books)")
 
 
 @cli.command("find-author")
@@ -117,6 +195,33 @@ def find_author_command(name):
         click.echo(f"{a.id}: {a.name}")
 
 
+@cli.command("dedupe-authors")
+@click.option("--dry-run", is_flag=True, help="Only report what would be merged")
+@click.option("--threshold", type=float, default=0.9, help="Minimum name similarity (0-1) to merge")
+@click.option("--limit", type=int, default=50, help="Number of merge groups to print")
+def dedupe_authors_command(dry_run, threshold, limit):
+    """Merge authors recorded under different spellings of the same name."""
+    with SessionLocal() as session:
+        clusters, skipped = dedupe.find_duplicates(session, threshold)
+        if not clusters:
+            click.echo("No duplicate authors found.")
+            return
+        for (cid, cname, ccount), dups in clusters[:limit]:
+            click.echo(f"{cid}: {cname} ({ccount} books)")
+            for (did, dname, dcount), score in dups:
+                click.echo(f"    <- {did}: {dname} ({dcount} books, score {score:.2f})")
+        if len(clusters) > limit:
+            click.echo(f"... and {len(clusters) - limit} more groups")
+        if skipped:
+            click.echo(f"Skipped {skipped} oversized name blocks.", err=True)
+        duplicates = sum(len(dups) for _, dups in clusters)
+        if dry_run:
+            click.echo(f"Dry run: {duplicates} authors would be merged into {len(clusters)}.")
+        else:
+            dedupe.merge_duplicates(session, clusters)
+            click.echo(f"Merged {duplicates} authors into {len(clusters)}.")
+
+
 # Borrowers commands
 @cli.command("add-borrower")
 @click.argument("name")
@@ -133,29 +238,46 @@ def add_borrower_command(name, contacts):
 def list_borrowers_command():
     """List borrowers"""
     with SessionLocal() as session:
-        borrowers = helpers.list_borrowers(session)
-        for b in borrowers:
-            click.echo(f"{b.id}: {b.name} ({b.contacts})")
+        _echo_each(helpers.list_borrowers(session, rows=True), lambda b: f"{b.id}: {b.name} ({b.contacts})")
 
 
 @cli.command("delete-borrower")
 @click.argument("borrower_id", type=int)
 def delete_borrower_command(borrower_id):
     """Delete borrower"""
-    with SessionLocal() as session:
-        helpers.delete_borrower(session, borrower_id)
-        session.commit()
-        click.echo("Borrower deleted.")
+    try:
+        with SessionLocal() as session:
+            helpers.delete_borrower(session, borrower_id)
+            click.echo("Borrower deleted.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("delete-borrowers")
+@click.argument("borrower_ids", nargs=-1, type=int)
+@click.option("--inactive-since", type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="Only borrowers with no loans since this date (YYYY-MM-DD)")
+@click.option("--chunk-size", type=int, default=500, help="Borrowers deleted per transaction")
+def delete_borrowers_command(borrower_ids, inactive_since, chunk_size):
+    """Delete many borrowers by ID and/or inactivity; borrowers with books out are kept."""
+    try:
+        with SessionLocal() as session:
+            deleted, refused = helpers.delete_borrowers(session, borrower_ids, inactive_since, chunk_size)
+            click.echo(f"Deleted {deleted} borrowers.")
+            if refused:
+                click.echo(f"Kept {refused} borrowers who still have books on loan.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
 
 
 # Borrowing
 @cli.command("borrow-book")
 @click.argument("book_title")
 @click.argument("borrower_name")
-def borrow_command(book_name, borrower_name):
+def borrow_command(book_title, borrower_name):
     """Borrow book"""
     with SessionLocal() as session:
-        borrower = session.query(Borrower).filter_by(name=borrower_name).first()
+        borrower = helpers.find_borrower(session, borrower_name)
         contacts = None
         if not borrower:
             contacts = click.prompt(f"New borrower '{borrower_name}'. Enter contacts")
@@ -167,60 +289,125 @@ def borrow_command(book_name, borrower_name):
 @cli.command("return-book")
 @click.argument("book_title")
 @click.argument("borrower_name")
-def return_command(book_name, borrower_name):
+def return_command(book_title, borrower_name):
     """Return book"""
     with SessionLocal() as session:
         helpers.return_book(session, book_title, borrower_name)
         session.commit()
         click.echo(f"Book '{book_title}' returned by {borrower_name}.")
 
+# Holds
+@cli.command("place-hold")
+@click.argument("book_title")
+@click.argument("borrower_name")
+def place_hold_command(book_title, borrower_name):
+    """Queue for a book that is currently out."""
+    try:
+        with SessionLocal() as session:
+            helpers.place_hold(session, book_title, borrower_name)
+            click.echo(f"Hold placed on '{book_title}' for {borrower_name}.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("cancel-hold")
+@click.argument("book_title")
+@click.argument("borrower_name")
+def cancel_hold_command(book_title, borrower_name):
+    """Cancel a hold."""
+    try:
+        with SessionLocal() as session:
+            helpers.cancel_hold(session, book_title, borrower_name)
+            click.echo(f"Hold on '{book_title}' for {borrower_name} cancelled.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("holds")
+@click.argument("book_title")
+def holds_command(book_title):
+    """Show the hold queue for a book."""
+    try:
+        with SessionLocal() as session:
+            holds = helpers.list_holds(session, book_title)
+            if not holds:
+                click.echo("No holds for this book.")
+            position = 0
+            for _, name, created_at, assigned_at, expires_at in holds:
+                if assigned_at:
+                    click.echo(f"Reserved for: {name} | Pick up by: {expires_at}")
+                else:
+                    position += 1
+                    click.echo(f"{position}. {name} | Waiting since: {created_at}")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("expire-holds")
+@click.option("--batch-size", type=int, default=1000, help="Holds processed per transaction")
+def expire_holds_command(batch_size):
+    """Release reserved books whose holds were not picked up."""
+    with SessionLocal() as session:
+        expired = helpers.expire_holds(session, batch_size)
+        click.echo(f"Expired {expired} holds.")
+
 #Report commands
 @cli.command("borrowed-books")
-def borrowed_books_command():
+@branches_option
+def borrowed_books_command(branches):
     """List all currently borrowed books with borrower names."""
-    with SessionLocal() as session:
-        records = helpers.get_borrowed_books(session)
-        if not records:
-            click.echo("No borrowed books.")
-        else:
+    if branches:
+        for branch, records in _federated(branches, lambda s: helpers.get_borrowed_books(s, rows=True)):
             for r in records:
-                click.echo(f"Book: {r.book.title} | Borrower: {r.borrower.name} | Borrowed on: {r.borrow_date}")
+                click.echo(f"[{branch}] Book: {r.book_title} | Borrower: {r.borrower_name} | Borrowed on: {r.borrow_date}")
+        return
+    with SessionLocal() as session:
+        _echo_each(helpers.get_borrowed_books(session, rows=True),
+                   lambda r: f"Book: {r.book_title} | Borrower: {r.borrower_name} | Borrowed on: {r.borrow_date}",
+                   "No borrowed books.")
 
 @cli.command("history")
 @click.argument("book_id", type=int)
 def history_command(book_id):
     """Show all past borrowing records for a book."""
     with SessionLocal() as session:
-        book = session.query(Book).get(book_id)
+        book = session.get(Book, book_id)
         if not book:
             click.echo("Book not found.")
             return
-        history = helpers.borrowing_history(session, book)
-        if not history:
-            click.echo("No history for this book.")
-        else:
-            for r in history:
-                click.echo(f"Borrower: {r.borrower.name} | Borrowed: {r.borrow_date} | Returned: {r.return_date or 'Not returned'}")
+        _echo_each(helpers.borrowing_history(session, book, rows=True),
+                   lambda r: f"Borrower: {r.borrower_name} | Borrowed: {r.borrow_date} | Returned: {r.return_date or 'Not returned'}",
+                   "No history for this book.")
 
 @cli.command("late-returns")
 @click.option("--days", type=int, default=30, help="Number of days overdue")
-def late_returns_command(days):
+@branches_option
+def late_returns_command(days, branches):
     """Find overdue books."""
+    if branches:
+        now = datetime.now()
+        results = _federated(branches, lambda s: helpers.late_returns(s, days=days, rows=True))
+        for branch, r in federation.merge_ranked(results, key=lambda r: r.borrow_date):
+            click.echo(f"[{branch}] Book: {r.book_title} | Borrower: {r.borrower_name} | Overdue: {(now - r.borrow_date).days} days")
+        return
     with SessionLocal() as session:
-        late = helpers.late_returns(session, days=days)
-        if not late:
-            click.echo("No overdue books.")
-        else:
-            for r in late:
-                overdue_days = (datetime.now() - r.borrow_date).days
-                click.echo(f"Book: {r.book.title} | Borrower: {r.borrower.name} | Overdue: {overdue_days} days")
+        now = datetime.now()
+        _echo_each(helpers.late_returns(session, days=days, rows=True),
+                   lambda r: f"Book: {r.book_title} | Borrower: {r.borrower_name} | Overdue: {(now - r.borrow_date).days} days",
+                   "No overdue books.")
 
 @cli.command("top-authors")
 @click.option("--number", type=int, default=5, help="Number of top authors to show")
-def top_authors_command(number):
+@branches_option
+def top_authors_command(number, branches):
     """List authors by number of books."""
+    if branches:
+        results = _federated(branches, helpers.author_book_counts)
+        for name, count, found_in in federation.sum_ranked(results, number):
+            click.echo(f"{name} ({count} books in {found_in} branches)")
+        return
     with SessionLocal() as session:
-        authors = helpers.top_authors(session, number)
+        authors = helpers.top_authors(session, number, rows=True)
         if not authors:
             click.echo("No authors found.")
         else:
@@ -230,10 +417,16 @@ def top_authors_command(number):
 
 @cli.command("top-borrowers")
 @click.option("--number", type=int, default=5, help="Number of top borrowers to show")
-def top_borrowers_command(number):
+@branches_option
+def top_borrowers_command(number, branches):
     """Show top borrowers by borrow count."""
+    if branches:
+        results = _federated(branches, helpers.borrower_loan_counts)
+        for name, borrow_count, found_in in federation.sum_ranked(results, number):
+            click.echo(f"Borrower: {name} | Borrowed: {borrow_count} books in {found_in} branches")
+        return
     with SessionLocal() as session:
-        borrowers = helpers.top_borrower(session, number)
+        borrowers = helpers.top_borrower(session, number, rows=True)
         if not borrowers:
             click.echo("No borrowers found.")
         else:
@@ -241,9 +434,143 @@ def top_borrowers_command(number):
                 click.echo(f"Borrower: {borrower.name} | Borrowed: {borrow_count} books")
 
 
+# Change feed
+@cli.command("watch")
+@click.option("--since", type=int, default=0, help="Cursor to resume after (0 = from the start)")
+@click.option("--follow", is_flag=True, help="Keep waiting for new changes")
+@click.option("--interval", type=float, default=1.0, help="Seconds between checks while idle")
+@click.option("--batch-size", type=int, default=500, help="Changes read per query")
+def watch_command(since, follow, interval, batch_size):
+    """Stream changes to books, borrowers and loans as JSON lines."""
+    try:
+        for change in changes.watch(engine, since, follow, interval, batch_size):
+            click.echo(json.dumps(change))
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command("truncate-changes")
+@click.option("--upto", type=int, help="Delete changes up to and including this cursor")
+@click.option("--older-than", type=int, help="Delete changes older than this many days")
+@click.option("--batch-size", type=int, default=5000, help="Changes deleted per transaction")
+def truncate_changes_command(upto, older_than, batch_size):
+    """Delete consumed changes from the feed."""
+    if upto is None and older_than is None:
+        click.echo("Error: give --upto and/or --older-than", err=True)
+        return
+    with SessionLocal() as session:
+        deleted = changes.truncate_changes(session, upto, older_than, batch_size)
+        click.echo(f"Deleted {deleted} changes.")
+
+
+# Recommendations
+@cli.command("build-recommendations")
+@click.option("--full", is_flag=True, help="Rebuild from all loans instead of only new ones")
+@click.option("--top-k", type=int, default=recommend.TOP_K, help="Neighbours stored per book")
+def build_recommendations_command(full, top_k):
+    """Update "also borrowed" recommendations from new loans."""
+    try:
+        with SessionLocal() as session:
+            loans, books = recommend.build_recommendations(session, engine.url.database, full, top_k)
+            click.echo(f"Processed {loans} loans, refreshed recommendations for {books} books.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("recommend")
+@click.argument("book_id", type=int)
+@click.option("--number", type=int, default=5, help="Number of books to suggest")
+def recommend_command(book_id, number):
+    """Show books that borrowers of this book also borrowed."""
+    with SessionLocal() as session:
+        books = recommend.recommend(session, book_id, number)
+        if not books:
+            click.echo("No recommendations for this book.")
+        else:
+            for bid, title, score in books:
+                click.echo(f"{bid}: {title} (borrowed together {score} times)")
+
+
+# Metrics
+@cli.command("metrics")
+@click.option("--days", type=int, default=30, help="Days after which an open loan counts as overdue")
+@click.option("--reset", is_flag=True, help="Clear recorded counters after printing them")
+def metrics_command(days, reset):
+    """Print command/helper metrics and library gauges in Prometheus format."""
+    path = metrics.state_path(engine.url.database)
+    with SessionLocal() as session:
+        click.echo(metrics.render(metrics.load(path), metrics.gauges(session, days), days), nl=False)
+    if reset:
+        metrics.reset(path)
+
+
+# Backup commands
+def _echo_progress(done, total):
+    click.echo(f"\rCopied {done}/{total} pages ({100 * done // max(total, 1)}%)", nl=False, err=True)
+
+
+@cli.command("backup")
+@click.argument("dest")
+@click.option("--pages", type=int, default=256, help="Pages copied per step")
+@click.option("--sleep", type=float, default=0.05, help="Seconds to pause between steps")
+@click.option("--compress", type=click.Choice(backup.COMPRESSIONS), default="none", help="Stream compression")
+@click.option("--incremental", "base", type=click.Path(exists=True, dir_okay=False),
+              help="Full backup to diff against; only changed pages are written")
+def backup_command(dest, pages, sleep, compress, base):
+    """Back up the live database without blocking readers or writers."""
+    source = engine.url.database
+    try:
+        if base:
+            size, elapsed, changed = backup.backup_delta(source, base, dest, pages, sleep, compress, _echo_progress)
+            click.echo(err=True)
+            click.echo(f"Incremental backup written to {dest}: {changed} changed pages.")
+        else:
+            size, elapsed = backup.backup_database(source, dest, pages, sleep, compress, _echo_progress)
+            click.echo(err=True)
+            click.echo(f"Backup written to {dest}.")
+        click.echo(f"Copied {size / 2**20:.1f} MiB in {elapsed:.2f}s ({size / 2**20 / max(elapsed, 1e-9):.1f} MiB/s). Integrity check ok.")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("restore")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.option("--delta", type=click.Path(exists=True, dir_okay=False), help="Incremental backup to apply on top of SOURCE")
+@click.option("--pages", type=int, default=256, help="Pages copied per step")
+@click.option("--sleep", type=float, default=0.05, help="Seconds to pause between steps")
+@click.confirmation_option(prompt="This replaces the current database. Continue?")
+def restore_command(source, delta, pages, sleep):
+    """Restore the database from a backup."""
+    try:
+        size, elapsed = backup.restore_database(source, engine.url.database, delta, pages, sleep, _echo_progress)
+        click.echo(err=True)
+        click.echo(f"Restored {size / 2**20:.1f} MiB in {elapsed:.2f}s ({size / 2**20 / max(elapsed, 1e-9):.1f} MiB/s).")
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@cli.command("menu")
+@click.option("--replica", is_flag=True, help="Serve reads from an in-memory copy of the database")
+def menu_command(replica):
+    """Interactive menu."""
+    menu(Replica() if replica else None)
+
+
 # Menue mode when no arguments are passed
 
-def menu():
+# Menu choices that only read, and so can be served by the replica
+MENU_READS = {"2", "3", "7", "8", "10", "14", "15", "16", "17", "18"}
+
+@contextmanager
+def _reader(replica, session):
+    if replica is None:
+        yield session
+    else:
+        with replica.session() as reader:
+            yield reader
+
+
+def menu(replica=None):
     while True:
         print(logo)
         print("1. Add book")
@@ -269,7 +596,10 @@ def menu():
         choice = input("Enter choice: ").strip()
 
         try:
-            with SessionLocal() as session:
+            # Reads go to the in-memory replica when there is one; write
+            # choices never touch it, so they don't trigger a reload
+            use_replica = replica if choice in MENU_READS else None
+            with SessionLocal() as session, _reader(use_replica, session) as reader:
                 if choice == "1":
                     title = input("Book title: ")
                     author = input("Author: ")
@@ -280,13 +610,13 @@ def menu():
                     print("Book added.")
 
                 elif choice == "2":
-                    for b in helpers.list_books(session):
-                        print(f"{b.id}: {b.title} by {b.author.name}")
+                    _echo_each(helpers.list_books(reader, rows=True),
+                               lambda b: f"{b.id}: {b.title} by {b.author_name}", "No books found.", print)
 
                 elif choice == "3":
                     query = input("Search query: ")
-                    for b in helpers.search_book(session, query):
-                        print(f"{b.id}: {b.title} by {b.author.name}")
+                    _echo_each(helpers.search_book(reader, query, rows=True),
+                               lambda b: f"{b.id}: {b.title} by {b.author_name}", "No books found.", print)
 
                 elif choice == "4":
                     bid = int(input("Book ID to delete: "))
@@ -309,12 +639,12 @@ def menu():
                     print("Author added.")
 
                 elif choice == "7":
-                    for a, count in helpers.list_authors(session):
-                        print(f"{a.name} ({count} books)")
+                    _echo_each(helpers.list_authors(reader, rows=True),
+                               lambda entry: f"{entry[0].name} ({entry[1]} books)", "No authors found.", print)
 
                 elif choice == "8":
                     name = input("Author name: ")
-                    a = helpers.find_author(session, name)
+                    a = helpers.find_author(reader, name)
                     print(f"{a.id}: {a.name}")
 
                 elif choice == "9":
@@ -325,8 +655,8 @@ def menu():
                     print("Borrower added.")
 
                 elif choice == "10":
-                    for b in helpers.list_borrowers(session):
-                        print(f"{b.id}: {b.name} ({b.contacts})")
+                    _echo_each(helpers.list_borrowers(reader, rows=True),
+                               lambda b: f"{b.id}: {b.name} ({b.contacts})", "No borrowers found.", print)
 
                 elif choice == "11":
                     bid = int(input("Borrower ID to delete: "))
@@ -337,7 +667,7 @@ def menu():
                 elif choice == "12":
                     book_title = input("Book title: ")
                     borrower_name = input("Borrower name: ")
-                    borrower = session.query(Borrower).filter_by(name=borrower_name).first()
+                    borrower = helpers.find_borrower(session, borrower_name)
                     contacts = None
                     if not borrower:
                         contacts = input(f"New borrower '{borrower_name}'. Enter contacts: ")
@@ -355,39 +685,30 @@ def menu():
 
 
                 elif choice == "14":
-                    records = helpers.get_borrowed_books(session)
-                    if not records:
-                        print("No borrowed books.")
-                    else:
-                        for r in records:
-                            print(f"Book: {r['book_title']} | Borrower: {r['borrower_name']} | Borrowed on: {r['borrow_date']}")
+                    _echo_each(helpers.get_borrowed_books(reader, rows=True),
+                               lambda r: f"Book: {r.book_title} | Borrower: {r.borrower_name} | Borrowed on: {r.borrow_date}",
+                               "No borrowed books.", print)
 
                 elif choice == "15":
                     book_id = int(input("Enter book ID: "))
-                    book = session.query(Book).get(book_id)
+                    book = reader.get(Book, book_id)
                     if not book:
                         print("Book not found.")
                     else:
-                        history = helpers.borrowing_history(session, book)
-                        if not history:
-                            print("No history for this book.")
-                        else:
-                            for r in history:
-                                print(f"Borrower: {r.borrower.name} | Borrowed: {r.borrow_date} | Returned: {r.return_date or 'Not returned'}")
+                        _echo_each(helpers.borrowing_history(reader, book, rows=True),
+                                   lambda r: f"Borrower: {r.borrower_name} | Borrowed: {r.borrow_date} | Returned: {r.return_date or 'Not returned'}",
+                                   "No history for this book.", print)
 
                 elif choice == "16":
                     days = input("Days overdue (default 30): ") or "30"
-                    late = helpers.late_returns(session, days=int(days))
-                    if not late:
-                        print("No overdue books.")
-                    else:
-                        for r in late:
-                            overdue_days = (datetime.now() - r.borrow_date).days
-                            print(f"Book: {r.book.title} | Borrower: {r.borrower.name} | Overdue: {overdue_days} days")
+                    now = datetime.now()
+                    _echo_each(helpers.late_returns(reader, days=int(days), rows=True),
+                               lambda r: f"Book: {r.book_title} | Borrower: {r.borrower_name} | Overdue: {(now - r.borrow_date).days} days",
+                               "No overdue books.", print)
 
                 elif choice == "17":
                     num = input("Number of authors (default 5): ") or "5"
-                    authors = helpers.top_authors(session, int(num))
+                    authors = helpers.top_authors(reader, int(num), rows=True)
                     if not authors:
                         print("No authors found.")
                     else:
@@ -396,7 +717,7 @@ def menu():
 
                 elif choice == "18":
                     num = input("Number of borrowers (default 5): ") or "5"
-                    borrowers = helpers.top_borrower(session, int(num))
+                    borrowers = helpers.top_borrower(reader, int(num), rows=True)
                     if not borrowers:
                         print("No borrowers found.")
                     else:
@@ -413,11 +734,21 @@ def menu():
             print(f"Error: {e}")
 
 
-#main to run as script
+def main():
+    """Entry point: time every command and helper, then run the CLI or the menu.
 
-if __name__ == "__main__":
-    import sys
+    Counters are saved to the shared metrics file when the process exits.
+    Done here rather than at import so importing booklib.cli has no side effects."""
+    metrics.instrument_module(helpers)
+    metrics.instrument_commands(cli)
+    atexit.register(metrics.flush, metrics.state_path(engine.url.database))
     if len(sys.argv) > 1:
-        cli()   
+        cli()
     else:
-        menu()  
+        menu()
+
+
+#main to run as script
+
+if __name__ == "__main__":
+    main()
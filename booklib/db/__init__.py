@@ -1,7 +1,7 @@
 # booklib/db/__init__.py
 
 from .database import engine, SessionLocal
-from .models import Base, Author, Book, Borrower, BorrowRecords
+from .models import Base, Author, Book, Borrower, BorrowRecords, BookRecommendation, Hold, Change
 
 __all__ = [
     "engine",
@@ -11,5 +11,8 @@ __all__ = [
     "Book",
     "Borrower",
     "BorrowRecords",
+    "BookRecommendation",
+    "Hold",
+    "Change",
 ]
 
@@ -14,9 +14,10 @@ class Book(Base):
     # Foreign Key to Authors
     author_id = Column(Integer, ForeignKey("authors.id"), nullable=False)
 
-    # Relationships
+    # Relationships (loans and holds are removed by ON DELETE CASCADE)
     author = relationship("Author", back_populates="books")
-    borrow_records = relationship("BorrowRecords", back_populates="book")
+    borrow_records = relationship("BorrowRecords", back_populates="book", cascade="all, delete-orphan", passive_deletes=True)
+    holds = relationship("Hold", back_populates="book", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Book(id={self.id}, title='{self.title}', available={self.available})>"
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from .base import Base
+
+class BookRecommendation(Base):
+    __tablename__ = "book_recommendations"
+
+    # Top-k "also borrowed" neighbours per book, rank 1 = strongest
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbour_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<BookRecommendation(book_id={self.book_id}, rank={self.rank}, neighbour_id={self.neighbour_id})>"
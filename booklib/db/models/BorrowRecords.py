@@ -1,18 +1,25 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from .base import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 class BorrowRecords(Base):
     __tablename__ = "borrow_records"
+    __table_args__ = (
+        # Open/overdue loan lookups: return_date IS NULL AND borrow_date < cutoff
+        Index("ix_borrow_records_open", "return_date", "borrow_date"),
+        # AUTOINCREMENT so ids of deleted loans are never reused; recommend.py
+        # uses max(id) as the cursor for loans it has already folded in
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True)
     borrow_date = Column(DateTime, default=datetime.utcnow)
     return_date = Column(DateTime, nullable=True)
 
     # Foreign Keys
-    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
-    borrower_id = Column(Integer, ForeignKey("borrowers.id"), nullable=False)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True)
+    borrower_id = Column(Integer, ForeignKey("borrowers.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
     book = relationship("Book", back_populates="borrow_records")
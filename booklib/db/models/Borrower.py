@@ -9,8 +9,9 @@ class Borrower(Base):
     name = Column(String, nullable=False)
     contacts = Column(String, nullable=False)
 
-    # Relationships
-    borrow_records = relationship("BorrowRecords", back_populates="borrower")
+    # Relationships (loans and holds are removed by ON DELETE CASCADE)
+    borrow_records = relationship("BorrowRecords", back_populates="borrower", cascade="all, delete-orphan", passive_deletes=True)
+    holds = relationship("Hold", back_populates="borrower", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Borrower(id={self.id}, name='{self.name}')>"
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, DDL, event, func
+from .base import Base
+
+# Columns captured into the change feed for each watched table
+WATCHED_TABLES = {
+    "books": ("id", "title", "year", "genre", "available", "author_id"),
+    "borrowers": ("id", "name", "contacts"),
+    "borrow_records": ("id", "book_id", "borrower_id", "borrow_date", "return_date"),
+}
+
+class Change(Base):
+    __tablename__ = "changes"
+    # AUTOINCREMENT so cursors are never reused after old changes are truncated
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    op = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    data = Column(Text)
+    changed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<Change(id={self.id}, table='{self.table_name}', op='{self.op}', row_id={self.row_id})>"
+
+
+def trigger_ddl():
+    '''CREATE TRIGGER statements that record inserts/updates/deletes into changes.'''
+    statements = []
+    for table, columns in WATCHED_TABLES.items():
+        for op, ref in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            payload = ", ".join(f"'{c}', {ref}.{c}" for c in columns)
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS changes_{table}_{op} AFTER {op.upper()} ON {table} BEGIN "
+                f"INSERT INTO changes (table_name, op, row_id, data) "
+                f"VALUES ('{table}', '{op}', {ref}.id, json_object({payload})); END"
+            )
+    return statements
+
+# Tables created with metadata.create_all (e.g. seed.py) get the triggers too.
+# Hooked on the metadata, not the changes table, so the watched tables exist.
+for _statement in trigger_ddl():
+    event.listen(Base.metadata, "after_create", DDL(_statement))
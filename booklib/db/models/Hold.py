@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, UniqueConstraint
+from .base import Base
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+class Hold(Base):
+    __tablename__ = "holds"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    # Set when the book is returned and reserved for this borrower
+    assigned_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+    # Foreign Keys
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
+    borrower_id = Column(Integer, ForeignKey("borrowers.id", ondelete="CASCADE"), nullable=False)
+
+    # Relationships
+    book = relationship("Book", back_populates="holds")
+    borrower = relationship("Borrower", back_populates="holds")
+
+    # Queue order per book: the next waiting hold is the first index entry
+    # with assigned_at IS NULL. A borrower holds a book at most once.
+    __table_args__ = (
+        Index("ix_holds_queue", "book_id", "assigned_at", "created_at", "id"),
+        UniqueConstraint("borrower_id", "book_id", name="uq_holds_borrower_book"),
+    )
+
+    def __repr__(self):
+        return f"<Hold(id={self.id}, book_id={self.book_id}, borrower_id={self.borrower_id})>"
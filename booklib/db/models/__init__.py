@@ -3,5 +3,8 @@ from .Author import Author
 from .Book import Book
 from .Borrower import Borrower
 from .BorrowRecords import BorrowRecords
+from .BookRecommendation import BookRecommendation
+from .Hold import Hold
+from .Change import Change
 
-__all__ = ["Base", "Author", "Book", "Borrower", "BorrowRecord"]
\ No newline at end of file
+__all__ = ["Base", "Author", "Book", "Borrower", "BorrowRecord", "BookRecommendation", "Hold", "Change"]
\ No newline at end of file
@@ -0,0 +1,57 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from .database import engine as disk_engine
+
+
+class Replica:
+    '''In-memory copy of the database for read-heavy, long-running processes.
+
+    The copy is loaded with the SQLite backup API. Writes keep going to
+    the on-disk database through SessionLocal; before each read the
+    replica checks PRAGMA data_version on a connection to the disk file
+    and reloads itself only when someone has committed since.'''
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or disk_engine.url.database
+        self.engine = create_engine(
+            "sqlite://", future=True, poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+        self.Session = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
+        self._disk = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._version = None
+        self.reloads = 0
+        self.refresh()
+
+    def _data_version(self):
+        return self._disk.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        '''Reload from disk if it changed since the last load. Returns True if reloaded.'''
+        version = self._data_version()
+        if version == self._version:
+            return False
+        memory = self.engine.raw_connection()
+        try:
+            target = memory.driver_connection
+            target.execute("PRAGMA query_only=OFF")
+            self._disk.backup(target)
+            target.execute("PRAGMA query_only=ON")
+        finally:
+            memory.close()
+        self._version = version
+        self.reloads += 1
+        return True
+
+    def session(self):
+        '''A read-only session on an up-to-date replica.'''
+        self.refresh()
+        return self.Session()
+
+    def close(self):
+        self._disk.close()
+        self.engine.dispose()
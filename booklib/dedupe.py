@@ -0,0 +1,194 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from sqlalchemy import select, func, text
+from .db.models import Author, Book
+
+# Author de-duplication: normalise names, group them into blocks by a cheap
+# key (soundex of the surname + first initial) and only score pairs inside
+# a block, so 500k authors never turn into an O(n²) comparison.
+
+_DROP_TOKENS = {"dr", "mr", "mrs", "ms", "prof", "sir", "jr", "sr", "ii", "iii"}
+_NON_WORD = re.compile(r"[^a-z ]+")
+_SOUNDEX = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+MAX_BLOCK = 1000  # blocks bigger than this are reported, not compared
+
+
+def normalize(name):
+    '''"Asimov, Isaac" / "ISAAC  ASIMOV" / "Isaac Asimov" → ("asimov", ("isaac",))'''
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    if "," in name:
+        last, _, first = name.partition(",")
+        name = f"{first} {last}"
+    tokens = [t for t in _NON_WORD.sub(" ", name).split() if t not in _DROP_TOKENS]
+    if not tokens:
+        return "", ()
+    return tokens[-1], tuple(tokens[:-1])
+
+def soundex(word):
+    '''Classic 4-character Soundex code.'''
+    if not word:
+        return ""
+    codes = word.translate(_SOUNDEX)
+    out, last = word[0].upper(), codes[0]
+    for ch, code in zip(word[1:], codes[1:]):
+        if code.isdigit() and code != last:
+            out += code
+        if ch not in "hw":
+            last = code
+    return (out + "000")[:4]
+
+def block_key(surname, given):
+    return f"{soundex(surname)}:{given[0][0] if given else ''}"
+
+
+GIVEN_RATIO = 0.9  # different full given names only match when this close (typos)
+
+def _given_score(a, b):
+    '''Given-name similarity: exact, initial/prefix, or a near-exact typo.
+
+    Distinct full names ("Mary"/"Mark", "Dan"/"Dean") score 0 so people
+    sharing a surname are never merged on the surname alone.'''
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    x, y = a[0], b[0]
+    if x == y:
+        return 0.95
+    if (len(x) == 1 and y.startswith(x)) or (len(y) == 1 and x.startswith(y)):
+        return 0.9
+    ratio = SequenceMatcher(None, " ".join(a), " ".join(b)).ratio()
+    return ratio if ratio >= GIVEN_RATIO else 0.0
+
+def score(a, b, threshold=0.0):
+    '''Similarity of two normalised names, 0..1.
+
+    Returns 0 early when the cheap SequenceMatcher upper bounds already
+    put the pair below threshold.'''
+    (sa, ga), (sb, gb) = a, b
+    if sa == sb:
+        surname = 1.0
+    else:
+        matcher = SequenceMatcher(None, sa, sb)
+        floor = (threshold - 0.4) / 0.6
+        if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+            return 0.0
+        surname = matcher.ratio()
+    return 0.6 * surname + 0.4 * _given_score(ga, gb)
+
+def _is_initial_only(given):
+    return bool(given) and len(given[0]) == 1
+
+
+def find_duplicates(session, threshold=0.9):
+    '''dedupe-authors --dry-run → Group authors that look like the same person.
+
+    Returns (clusters, skipped_blocks). Each cluster is
+    (canonical, [(duplicate, score), ...]) where every entry is an
+    (id, name, book_count) tuple. The canonical author is the one with
+    the most books, then the lowest id.'''
+    counts = dict(session.execute(select(Book.author_id, func.count(Book.id)).group_by(Book.author_id)).all())
+
+    blocks = defaultdict(list)
+    names = {}
+    for author_id, name in session.execute(select(Author.id, Author.name)):
+        key = normalize(name)
+        if not key[0]:
+            continue
+        names[author_id] = (name, key)
+        blocks[block_key(*key)].append(author_id)
+
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    best = {}
+    skipped = 0
+    for ids in blocks.values():
+        if len(ids) < 2:
+            continue
+        if len(ids) > MAX_BLOCK:
+            skipped += 1
+            continue
+        # Identical normalised names are merged without scoring; only one
+        # representative per distinct name takes part in pairwise scoring.
+        by_key = {}
+        pairs = []
+        for author_id in ids:
+            key = names[author_id][1]
+            if key in by_key:
+                pairs.append((author_id, by_key[key], 1.0))
+            else:
+                by_key[key] = author_id
+        reps = list(by_key.values())
+
+        # Initials ("I. Asimov") are only merged when they match one full name
+        initial_matches = defaultdict(set)
+        for i, a in enumerate(reps):
+            ka = names[a][1]
+            for b in reps[i + 1:]:
+                kb = names[b][1]
+                s = score(ka, kb, threshold)
+                if s < threshold:
+                    continue
+                if _is_initial_only(ka[1]) != _is_initial_only(kb[1]):
+                    short, full = (a, kb) if _is_initial_only(ka[1]) else (b, ka)
+                    initial_matches[short].add(full[1][0])
+                pairs.append((a, b, s))
+        for a, b, s in pairs:
+            if len(initial_matches.get(a, ())) > 1 or len(initial_matches.get(b, ())) > 1:
+                continue
+            parent.setdefault(a, a)
+            parent.setdefault(b, b)
+            parent[find(a)] = find(b)
+            best[a] = max(best.get(a, 0), s)
+            best[b] = max(best.get(b, 0), s)
+
+    groups = defaultdict(list)
+    for author_id in parent:
+        groups[find(author_id)].append(author_id)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda m: (-counts.get(m, 0), m))
+        row = lambda m: (m, names[m][0], counts.get(m, 0))
+        clusters.append((row(members[0]), [(row(m), best[m]) for m in members[1:]]))
+    clusters.sort(key=lambda c: (-len(c[1]), c[0][1]))
+    return clusters, skipped
+
+
+def merge_duplicates(session, clusters, chunk_size=10_000):
+    '''dedupe-authors → Repoint books to canonical authors and drop the duplicates.
+
+    Runs as one transaction: the old→new mapping goes into a temp table so
+    books are updated in a single pass instead of one UPDATE per author.'''
+    mapping = [
+        {"old_id": dup[0], "new_id": canonical[0]}
+        for canonical, dups in clusters
+        for dup, _ in dups
+    ]
+    if not mapping:
+        return 0
+    session.execute(text("CREATE TEMP TABLE IF NOT EXISTS author_merge (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)"))
+    session.execute(text("DELETE FROM author_merge"))
+    insert_stmt = text("INSERT INTO author_merge (old_id, new_id) VALUES (:old_id, :new_id)")
+    for start in range(0, len(mapping), chunk_size):
+        session.execute(insert_stmt, mapping[start:start + chunk_size])
+    session.execute(text(
+        "UPDATE books SET author_id = (SELECT new_id FROM author_merge WHERE old_id = books.author_id) "
+        "WHERE author_id IN (SELECT old_id FROM author_merge)"
+    ))
+    session.execute(text("DELETE FROM authors WHERE id IN (SELECT old_id FROM author_merge)"))
+    session.execute(text("DROP TABLE author_merge"))
+    session.commit()
+    return len(mapping)
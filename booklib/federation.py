@@ -0,0 +1,98 @@
+import heapq
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import perf_counter
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Federation: one booklib.db per branch, listed in branches.json as
+# {"name": "path/to/branch.db", ...}. Read-only reports run on every
+# branch at once in a thread pool (sqlite3 releases the GIL while a query
+# runs) and per-branch results are merged as they come back.
+
+BRANCHES_FILE = "branches.json"
+
+_factories = {}  # db path → sessionmaker
+
+
+def load_branches(path=BRANCHES_FILE):
+    '''Branch name → database path, in the order listed in the config.'''
+    if not os.path.exists(path):
+        raise ValueError(f"No branches config at {path}")
+    with open(path) as f:
+        branches = json.load(f)
+    if not isinstance(branches, dict) or not branches:
+        raise ValueError(f"{path} must map branch names to database files")
+    base = os.path.dirname(os.path.abspath(path))
+    return {name: os.path.join(base, db) for name, db in branches.items()}
+
+def select_branches(spec, path=BRANCHES_FILE):
+    '''"all" or a comma-separated list of branch names → [(name, db path), ...].'''
+    branches = load_branches(path)
+    if spec == "all":
+        return list(branches.items())
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in branches]
+    if unknown:
+        raise ValueError(f"Unknown branch(es): {', '.join(unknown)}")
+    return [(name, branches[name]) for name in names]
+
+def _session_factory(db_path):
+    if db_path not in _factories:
+        # Read-only URI so a typo in the config never creates an empty database
+        engine = create_engine(
+            f"sqlite:///file:{db_path}?mode=ro&uri=true", future=True,
+            connect_args={"check_same_thread": False},
+        )
+        _factories[db_path] = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    return _factories[db_path]
+
+
+def _run(db_path, query):
+    start = perf_counter()
+    try:
+        with _session_factory(db_path)() as session:
+            # Streaming helpers must be drained before the session closes
+            return list(query(session)), perf_counter() - start, None
+    except Exception as e:
+        return None, perf_counter() - start, e
+
+def fan_out(branches, query, max_workers=None):
+    '''Run query(session) against every branch concurrently.
+
+    Yields (branch, result, seconds, error) as each branch finishes, so
+    callers can stream results; a failing branch yields its exception
+    instead of stopping the others.'''
+    with ThreadPoolExecutor(max_workers=max_workers or len(branches) or 1) as pool:
+        futures = {pool.submit(_run, db_path, query): name for name, db_path in branches}
+        for future in as_completed(futures):
+            result, seconds, error = future.result()
+            yield futures[future], result, seconds, error
+
+def merge_ranked(results, key):
+    '''k-way merge of per-branch lists that are each already sorted by key.
+
+    results is an iterable of (branch, rows); yields (branch, row) in
+    global key order without re-sorting the combined rows.'''
+    return heapq.merge(*(_tagged(branch, rows) for branch, rows in results), key=lambda entry: key(entry[1]))
+
+def _tagged(branch, rows):
+    for row in rows:
+        yield branch, row
+
+def sum_ranked(results, number):
+    '''System-wide top-N from per-branch (name, count) rows.
+
+    Counts for the same name are added across branches before ranking,
+    so something spread over many branches beats a single-branch leader.
+    Returns [(name, total, branches it appears in), ...].'''
+    totals, seen = Counter(), Counter()
+    for _, rows in results:
+        for name, count in rows:
+            totals[name] += count
+            seen[name] += 1
+    top = heapq.nsmallest(number, totals.items(), key=lambda item: (-item[1], item[0]))
+    return [(name, total, seen[name]) for name, total in top]
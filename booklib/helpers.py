@@ -1,20 +1,172 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from .db.models import Author, Book, Borrower, BorrowRecords
-from datetime import datetime
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, update, delete, func, bindparam
+from .db.models import Author, Book, Borrower, BorrowRecords, Hold
+from .read_models import (
+    BookRow, AuthorRow, BorrowerRow, LoanRow,
+    book_select, author_select, borrower_select, loan_select,
+    to_counted_rows, iter_rows, iter_counted_rows,
+)
+from datetime import datetime, timedelta
 from sqlalchemy.exc import NoResultFound
 
+HOLD_DAYS = 3  # days a returned book stays reserved for the next hold
+STREAM_BATCH = 1000  # rows fetched per round trip by the listing helpers
+
+# Statements are built once at import and executed with bound parameters,
+# so each call only hits SQLAlchemy's compiled cache instead of rebuilding
+# the query (and its ILIKE patterns) from scratch.
+#
+# Listings and reports whose size grows with the tables are executed with
+# yield_per and returned as iterators, so callers must consume them while
+# the session is still open. Top-N reports stay lists.
+
+_author_by_name = select(Author).where(Author.name == bindparam("name")).limit(1)
+_borrower_by_name = select(Borrower).where(Borrower.name == bindparam("name")).limit(1)
+_book_by_title = select(Book).where(Book.title == bindparam("title")).limit(1)
+
+_open_loan = select(BorrowRecords).where(
+    BorrowRecords.book_id == bindparam("book_id"),
+    BorrowRecords.borrower_id == bindparam("borrower_id"),
+    BorrowRecords.return_date.is_(None),
+).limit(1)
+
+_next_hold = (
+    select(Hold)
+    .where(Hold.book_id == bindparam("book_id"), Hold.assigned_at.is_(None))
+    .order_by(Hold.created_at, Hold.id)
+    .limit(1)
+)
+_hold_for = select(Hold).where(Hold.borrower_id == bindparam("borrower_id"), Hold.book_id == bindparam("book_id"))
+_hold_queue = (
+    select(Hold.id, Borrower.name, Hold.created_at, Hold.assigned_at, Hold.expires_at)
+    .join(Borrower, Hold.borrower_id == Borrower.id)
+    .where(Hold.book_id == bindparam("book_id"))
+    .order_by(Hold.assigned_at.is_(None), Hold.created_at, Hold.id)
+)
+_expired_holds = (
+    select(Hold.id, Hold.book_id)
+    .where(Hold.expires_at < bindparam("now"))
+    .order_by(Hold.expires_at)
+    .limit(bindparam("batch_size"))
+)
+
+# Set-based versions for expire_holds, correlated to each book in a batch
+_waiting = aliased(Hold)
+_next_waiting_id = (
+    select(_waiting.id)
+    .where(_waiting.book_id == Book.id, _waiting.assigned_at.is_(None))
+    .order_by(_waiting.created_at, _waiting.id)
+    .limit(1)
+    .scalar_subquery()
+)
+_reserved = select(Hold.id).where(Hold.book_id == Book.id, Hold.assigned_at.is_not(None)).exists()
+
+_book_on_loan = select(BorrowRecords.id).where(
+    BorrowRecords.book_id == Book.id, BorrowRecords.return_date.is_(None)
+).exists()
+_borrower_has_loan = select(BorrowRecords.id).where(
+    BorrowRecords.borrower_id == Borrower.id, BorrowRecords.return_date.is_(None)
+).exists()
+
+_book_match = (
+    Book.title.ilike(bindparam("pattern")) |
+    Book.genre.ilike(bindparam("pattern")) |
+    Author.name.ilike(bindparam("pattern"))
+)
+_author_match = Author.name.ilike(bindparam("pattern"))
+_overdue = (BorrowRecords.return_date.is_(None), BorrowRecords.borrow_date < bindparam("cutoff"))
+
+_stream = {"yield_per": STREAM_BATCH}
+
+_list_books = select(Book).execution_options(**_stream)
+_list_book_rows = book_select().order_by(Book.id).execution_options(**_stream)
+_search_books = select(Book).join(Author).where(_book_match).execution_options(**_stream)
+_search_book_rows = book_select().where(_book_match).execution_options(**_stream)
+
+_list_authors = (
+    select(Author, func.count(Book.id))
+    .join(Book, Book.author_id == Author.id, isouter=True)
+    .group_by(Author.id)
+    .execution_options(**_stream)
+)
+_list_author_rows = (
+    author_select().add_columns(func.count(Book.id))
+    .join(Book, Book.author_id == Author.id, isouter=True)
+    .group_by(Author.id)
+    .execution_options(**_stream)
+)
+_find_authors = select(Author).where(_author_match)
+
+_list_borrowers = select(Borrower).execution_options(**_stream)
+_list_borrower_rows = borrower_select().order_by(Borrower.id).execution_options(**_stream)
+
+_borrowed_books = (
+    select(BorrowRecords.id, Book.title, Borrower.name, BorrowRecords.borrow_date)
+    .join(BorrowRecords.book)
+    .join(BorrowRecords.borrower)
+    .where(BorrowRecords.return_date.is_(None))
+    .execution_options(**_stream)
+)
+_borrowed_book_rows = loan_select().where(BorrowRecords.return_date.is_(None)).execution_options(**_stream)
+_history = select(BorrowRecords).where(BorrowRecords.book_id == bindparam("book_id")).execution_options(**_stream)
+_history_rows = loan_select().where(BorrowRecords.book_id == bindparam("book_id")).execution_options(**_stream)
+# Oldest loan first; ix_borrow_records_open already returns them in this order
+_late = select(BorrowRecords).where(*_overdue).order_by(BorrowRecords.borrow_date).execution_options(**_stream)
+_late_rows = loan_select().where(*_overdue).order_by(BorrowRecords.borrow_date).execution_options(**_stream)
+
+_book_count = func.count(Book.id)
+_top_authors = (
+    select(Author, _book_count.label("book_count"))
+    .join(Book, Book.author_id == Author.id)
+    .group_by(Author.id).order_by(_book_count.desc()).limit(bindparam("number"))
+)
+_top_author_rows = (
+    author_select().add_columns(_book_count)
+    .join(Book, Book.author_id == Author.id)
+    .group_by(Author.id).order_by(_book_count.desc()).limit(bindparam("number"))
+)
+_borrow_count = func.count(BorrowRecords.id)
+_top_borrowers = (
+    select(Borrower, _borrow_count.label("borrow_count"))
+    .join(BorrowRecords, BorrowRecords.borrower_id == Borrower.id)
+    .group_by(Borrower.id).order_by(_borrow_count.desc()).limit(bindparam("number"))
+)
+_top_borrower_rows = (
+    borrower_select().add_columns(_borrow_count)
+    .join(BorrowRecords, BorrowRecords.borrower_id == Borrower.id)
+    .group_by(Borrower.id).order_by(_borrow_count.desc()).limit(bindparam("number"))
+)
+# Per-name totals, summed across branch databases by top-authors/top-borrowers --branches
+_author_book_counts = (
+    select(Author.name, _book_count)
+    .join(Book, Book.author_id == Author.id)
+    .group_by(Author.name)
+    .execution_options(**_stream)
+)
+_borrower_loan_counts = (
+    select(Borrower.name, _borrow_count)
+    .join(BorrowRecords, BorrowRecords.borrower_id == Borrower.id)
+    .group_by(Borrower.name)
+    .execution_options(**_stream)
+)
+
+
+def _get_or_create_author(session, name):
+    '''Returns the author with this exact name, creating it if missing.'''
+    db_author = session.scalars(_author_by_name, {"name": name}).first()
+    if not db_author:
+        db_author = Author(name=name)
+        session.add(db_author)
+        session.commit()
+    return db_author
+
 # Books Management
 def add_book(session, title, author, year, genre):
     '''add-book → Add a new book with title, author, year, genre.'''
     if not title or not author:
         raise ValueError("Both title and author are required")
 
-    db_author = session.query(Author).filter_by(name=author).first()
-    if not db_author:
-        db_author = Author(name=author)
-        session.add(db_author)
-        session.commit()
+    db_author = _get_or_create_author(session, author)
 
     book = Book(title=title, year=year, genre=genre, author=db_author, available=True)
     session.add(book)
@@ -22,41 +174,64 @@ def add_book(session, title, author, year, genre):
     session.refresh(book)
     return book
 
-def list_books(session):
-    '''list-books → Show all books, with availability status.'''
-    return session.query(Book).all()
+def list_books(session, rows=False):
+    '''list-books → Show all books, with availability status.
 
-def search_book(session, title):
+    rows=True returns BookRow read models instead of ORM objects.'''
+    if rows:
+        return iter_rows(BookRow, session.execute(_list_book_rows))
+    return session.scalars(_list_books)
+
+def search_book(session, title, rows=False):
     '''search-book --title "Dune" → Find books by title, author, or genre.'''
-    return session.query(Book).join(Author).filter(
-        (Book.title.ilike(f"%{title}%")) |
-        (Book.genre.ilike(f"%{title}%")) |
-        (Author.name.ilike(f"%{title}%"))
-    ).all()
+    params = {"pattern": f"%{title}%"}
+    if rows:
+        return iter_rows(BookRow, session.execute(_search_book_rows, params))
+    return session.scalars(_search_books, params)
+
+def find_book(session, title):
+    '''Returns the first book with this exact title, or None.'''
+    return session.scalars(_book_by_title, {"title": title}).first()
 
 def delete_book(session, id):
-    '''delete-book <book_id> → Remove a book.'''
-    book = session.query(Book).get(id)
-    if not book:
-        raise NoResultFound("Book not found")
-    session.delete(book)
+    '''delete-book <book_id> → Remove a book; its history and holds cascade.'''
+    deleted = session.execute(
+        delete(Book).where(Book.id == id, ~_book_on_loan),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not deleted:
+        if session.get(Book, id) is None:
+            raise NoResultFound("Book not found")
+        raise ValueError("Book is on loan, return it first")
     session.commit()
     return True
 
+def delete_books(session, ids=None, genre=None, year_from=None, year_to=None, chunk_size=500):
+    '''delete-books → Remove many books by ID list and/or genre and year range.
+
+    Books on loan are refused. Returns (deleted, refused).'''
+    conditions = []
+    if ids:
+        conditions.append(Book.id.in_(ids))
+    if genre:
+        conditions.append(Book.genre.ilike(genre))
+    if year_from is not None:
+        conditions.append(Book.year >= year_from)
+    if year_to is not None:
+        conditions.append(Book.year <= year_to)
+    if not conditions:
+        raise ValueError("Give book IDs or at least one filter")
+    return _delete_in_chunks(session, Book, conditions, _book_on_loan, chunk_size)
+
 def update_book(session, id, title=None, author=None, year=None, genre=None):
     '''update-book <book_id> → Change title/author/year.'''
-    book = session.query(Book).get(id)
+    book = session.get(Book, id)
     if not book:
         raise NoResultFound("Book not found")
     if title:
         book.title = title
     if author:
-        db_author = session.query(Author).filter_by(name=author).first()
-        if not db_author:
-            db_author = Author(name=author)
-            session.add(db_author)
-            session.commit()
-        book.author = db_author
+        book.author = _get_or_create_author(session, author)
     if year:
         book.year = year
     if genre:
@@ -73,13 +248,15 @@ def add_author(session, name, birth_year, country):
     session.commit()
     return author
 
-def list_authors(session):
+def list_authors(session, rows=False):
     '''list-authors → Show authors and how many books they have.'''
-    return session.query(Author, func.count(Book.id)).join(Book, isouter=True).group_by(Author.id).all()
+    if rows:
+        return iter_counted_rows(AuthorRow, session.execute(_list_author_rows))
+    return session.execute(_list_authors)
 
 def find_author(session, name):
     '''find-author --name "Asimov"'''
-    return session.query(Author).filter(Author.name.ilike(f"%{name}%")).all()
+    return session.scalars(_find_authors, {"pattern": f"%{name}%"}).all()
 
 
 # Borrower Management
@@ -90,19 +267,64 @@ def add_borrower(session, name, contacts):
     session.commit()
     return borrower
 
-def list_borrowers(session):
+def list_borrowers(session, rows=False):
     '''list-borrowers → Show who can borrow.'''
-    return session.query(Borrower).all()
+    if rows:
+        return iter_rows(BorrowerRow, session.execute(_list_borrower_rows))
+    return session.scalars(_list_borrowers)
+
+def find_borrower(session, name):
+    '''Returns the borrower with this exact name, or None.'''
+    return session.scalars(_borrower_by_name, {"name": name}).first()
 
 def delete_borrower(session, id):
     '''delete-borrower <id>'''
-    borrower = session.query(Borrower).get(id)
-    if not borrower:
-        raise NoResultFound("Borrower not found")
-    session.delete(borrower)
+    deleted = session.execute(
+        delete(Borrower).where(Borrower.id == id, ~_borrower_has_loan),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not deleted:
+        if session.get(Borrower, id) is None:
+            raise NoResultFound("Borrower not found")
+        raise ValueError("Borrower still has books on loan")
     session.commit()
     return True
 
+def delete_borrowers(session, ids=None, inactive_since=None, chunk_size=500):
+    '''delete-borrowers → Remove many borrowers by ID list and/or no loans since a date.
+
+    Borrowers with books on loan are refused. Returns (deleted, refused).'''
+    conditions = []
+    if ids:
+        conditions.append(Borrower.id.in_(ids))
+    if inactive_since is not None:
+        conditions.append(~select(BorrowRecords.id).where(
+            BorrowRecords.borrower_id == Borrower.id,
+            BorrowRecords.borrow_date >= inactive_since,
+        ).exists())
+    if not conditions:
+        raise ValueError("Give borrower IDs or at least one filter")
+    return _delete_in_chunks(session, Borrower, conditions, _borrower_has_loan, chunk_size)
+
+def _delete_in_chunks(session, model, conditions, on_loan, chunk_size):
+    '''Set-based DELETE of matching rows, chunk_size ids per transaction.
+
+    Rows matching on_loan are left alone. ON DELETE CASCADE removes
+    their borrow_records and holds. Returns (deleted, refused).'''
+    refused = session.scalar(select(func.count()).select_from(model).where(*conditions, on_loan))
+    pick = select(model.id).where(*conditions, ~on_loan).order_by(model.id).limit(chunk_size)
+    deleted, last_id = 0, 0
+    while True:
+        ids = session.scalars(pick.where(model.id > last_id)).all()
+        if not ids:
+            return deleted, refused
+        deleted += session.execute(
+            delete(model).where(model.id.in_(ids), ~on_loan),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        session.commit()
+        last_id = ids[-1]
+
 
 # Borrowing / Returning
 def borrow(session, book_title, borrower_name, contacts=None):
@@ -110,19 +332,23 @@ def borrow(session, book_title, borrower_name, contacts=None):
     book_title = book_title.strip()
     borrower_name = borrower_name.strip()
 
-    borrower = session.query(Borrower).filter_by(name=borrower_name).first()
+    borrower = find_borrower(session, borrower_name)
     if not borrower:
         if not contacts:
             raise ValueError("Contacts required for new borrower")
         borrower = Borrower(name=borrower_name, contacts=contacts)
         session.add(borrower)
 
-    book = session.query(Book).filter_by(title=book_title).first()
+    book = find_book(session, book_title)
     if not book:
         raise NoResultFound(f"Book '{book_title}' not found")
 
     if not check_availability(session, book):
-        raise ValueError(f"'{book.title}' is not available")
+        # A returned book reserved for this borrower can be picked up
+        hold = session.scalars(_hold_for, {"borrower_id": borrower.id, "book_id": book.id}).first() if borrower.id else None
+        if not hold or not hold.assigned_at:
+            raise ValueError(f"'{book.title}' is not available, use place-hold to join the queue")
+        session.delete(hold)
 
     mark_as_unavailable(session, book)
     record = create_borrow_record(session, book, borrower)
@@ -131,7 +357,7 @@ def borrow(session, book_title, borrower_name, contacts=None):
 
 def check_availability(session, book):
     '''Checks if book is available.'''
-    
+
     return book.available
 
 def mark_as_unavailable(session, book):
@@ -149,66 +375,155 @@ def create_borrow_record(session, book, borrower):
 def return_book(session, book_title, borrower_name):
     '''return <book_id>'''
 
-    borrower = session.query(Borrower).filter_by(name=borrower_name).first()
+    borrower = find_borrower(session, borrower_name)
     if not borrower:
         raise NoResultFound(f"Borrower '{borrower_name}' not found")
 
-    book = session.query(Book).filter_by(title=book_title).first()
+    book = find_book(session, book_title)
     if not book:
         raise NoResultFound(f"Book '{book_title}' not found")
 
-    record = session.query(BorrowRecords).filter_by(book_id=book.id, borrower_id=borrower.id, return_date=False).first()
+    record = session.scalars(_open_loan, {"book_id": book.id, "borrower_id": borrower.id}).first()
     if not record:
         raise NoResultFound("Active borrow record not found")
-    update_return_date(session, record)
-    mark_as_available(session, book)
+    now = datetime.now()
+    record.return_date = now
+    assign_next_hold(session, book, now)
+    session.commit()
     return record
 
-def update_return_date(session, book_record):
-    '''Updates return_date.'''
-    book_record.return_date = datetime.now()
-    book_record.returned = True
-    session.commit()
 
-def mark_as_available(session, book):
-    '''Marks book available again.'''
-    book.available = True
+# Holds
+def place_hold(session, book_title, borrower_name):
+    '''place-hold <title> <borrower> → Join the queue for an unavailable book.'''
+    borrower = find_borrower(session, borrower_name)
+    if not borrower:
+        raise NoResultFound(f"Borrower '{borrower_name}' not found")
+    book = find_book(session, book_title)
+    if not book:
+        raise NoResultFound(f"Book '{book_title}' not found")
+    if book.available:
+        raise ValueError(f"'{book.title}' is available, borrow it instead")
+    if session.scalars(_hold_for, {"borrower_id": borrower.id, "book_id": book.id}).first():
+        raise ValueError(f"{borrower.name} already has a hold on '{book.title}'")
+    if session.scalars(_open_loan, {"book_id": book.id, "borrower_id": borrower.id}).first():
+        raise ValueError(f"{borrower.name} already has '{book.title}'")
+
+    hold = Hold(book_id=book.id, borrower_id=borrower.id, created_at=datetime.now())
+    session.add(hold)
     session.commit()
+    return hold
+
+def cancel_hold(session, book_title, borrower_name):
+    '''cancel-hold <title> <borrower> → Leave the queue; a reserved copy passes on.'''
+    borrower = find_borrower(session, borrower_name)
+    book = find_book(session, book_title)
+    hold = borrower and book and session.scalars(_hold_for, {"borrower_id": borrower.id, "book_id": book.id}).first()
+    if not hold:
+        raise NoResultFound(f"No hold on '{book_title}' for {borrower_name}")
+    was_assigned = hold.assigned_at is not None
+    session.delete(hold)
+    session.flush()
+    if was_assigned:
+        assign_next_hold(session, book, datetime.now())
+    session.commit()
+    return True
+
+def list_holds(session, book_title):
+    '''holds <title> → Queue for a book, reserved copy first.'''
+    book = find_book(session, book_title)
+    if not book:
+        raise NoResultFound(f"Book '{book_title}' not found")
+    return session.execute(_hold_queue, {"book_id": book.id}).all()
+
+def assign_next_hold(session, book, now):
+    '''Reserve the book for the next waiting hold, or make it available.
+
+    Does not commit, so it runs inside the caller's transaction.'''
+    hold = session.scalars(_next_hold, {"book_id": book.id}).first()
+    if hold:
+        hold.assigned_at = now
+        hold.expires_at = now + timedelta(days=HOLD_DAYS)
+        book.available = False
+    else:
+        book.available = True
+    return hold
+
+def expire_holds(session, batch_size=1000):
+    '''expire-holds → Drop reservations nobody picked up and pass the books on.
+
+    Works through expired holds in batches via the expires_at index with
+    one set-based UPDATE per batch, committing after each batch.
+    Returns the number expired.'''
+    now = datetime.now()
+    expired = 0
+    while True:
+        batch = session.execute(_expired_holds, {"now": now, "batch_size": batch_size}).all()
+        if not batch:
+            return expired
+        book_ids = list({book_id for _, book_id in batch})
+        options = {"synchronize_session": False}
+        session.execute(delete(Hold).where(Hold.id.in_([hold_id for hold_id, _ in batch])), execution_options=options)
+        session.execute(
+            update(Hold)
+            .where(Hold.id.in_(select(_next_waiting_id).where(Book.id.in_(book_ids))))
+            .values(assigned_at=now, expires_at=now + timedelta(days=HOLD_DAYS)),
+            execution_options=options,
+        )
+        session.execute(
+            update(Book).where(Book.id.in_(book_ids)).values(available=~_reserved),
+            execution_options=options,
+        )
+        session.commit()
+        expired += len(batch)
 
 
 # Reports / Queries
-def get_borrowed_books(session):
-    """Return list of dicts with book title, borrower name, borrow date."""
-    records = (
-        session.query(BorrowRecords)
-        .join(BorrowRecords.book)
-        .join(BorrowRecords.borrower)
-        .filter(BorrowRecords.return_date.is_(None))
-        .all()
-    )
-    return [
+def get_borrowed_books(session, rows=False):
+    """Yield dicts with book title, borrower name, borrow date.
+
+    rows=True yields LoanRow read models instead."""
+    if rows:
+        return iter_rows(LoanRow, session.execute(_borrowed_book_rows))
+    return (
         {
-            "book_title": record.book.title,
-            "borrower_name": record.borrower.name,
-            "borrow_date": record.borrow_date,
+            "book_title": book_title,
+            "borrower_name": borrower_name,
+            "borrow_date": borrow_date,
         }
-        for record in records
-    ]
+        for _, book_title, borrower_name, borrow_date in session.execute(_borrowed_books)
+    )
 
 
-def borrowing_history(session, book):
+def borrowing_history(session, book, rows=False):
     '''history <book_id> → Show all past borrowing records for a book.'''
-    return session.query(BorrowRecords).filter_by(book_id=book.id).all()
+    if rows:
+        return iter_rows(LoanRow, session.execute(_history_rows, {"book_id": book.id}))
+    return session.scalars(_history, {"book_id": book.id})
 
-def late_returns(session, borrow_records=None, days=30):
+def late_returns(session, borrow_records=None, days=30, rows=False):
     '''late-returns --days 30 → Find overdue books.'''
-    cutoff = datetime.now() - timedelta(days=days)
-    return session.query(BorrowRecords).filter(BorrowRecords.returned == False, BorrowRecords.borrow_date < cutoff).all()
+    params = {"cutoff": datetime.now() - timedelta(days=days)}
+    if rows:
+        return iter_rows(LoanRow, session.execute(_late_rows, params))
+    return session.scalars(_late, params)
 
-def top_authors(session, number=5):
+def top_authors(session, number=5, rows=False):
     '''top-authors → List authors by number of books in library.'''
-    return session.query(Author, func.count(Book.id).label("book_count")).join(Book).group_by(Author.id).order_by(func.count(Book.id).desc()).limit(number).all()
+    if rows:
+        return to_counted_rows(AuthorRow, session.execute(_top_author_rows, {"number": number}))
+    return session.execute(_top_authors, {"number": number}).all()
 
-def top_borrower(session, number=5):
+def top_borrower(session, number=5, rows=False):
     '''top-borrowers → People who borrowed the most.'''
-    return session.query(Borrower, func.count(BorrowRecords.id).label("borrow_count")).join(BorrowRecords).group_by(Borrower.id).order_by(func.count(BorrowRecords.id).desc()).limit(number).all()
+    if rows:
+        return to_counted_rows(BorrowerRow, session.execute(_top_borrower_rows, {"number": number}))
+    return session.execute(_top_borrowers, {"number": number}).all()
+
+def author_book_counts(session):
+    '''top-authors --branches → (author name, books) for every author with books.'''
+    return session.execute(_author_book_counts)
+
+def borrower_loan_counts(session):
+    '''top-borrowers --branches → (borrower name, loans) for everyone who borrowed.'''
+    return session.execute(_borrower_loan_counts)
@@ -0,0 +1,63 @@
+import functools
+import inspect
+import tracemalloc
+
+# --memory-report: trace Python allocations for one command with
+# tracemalloc. tracemalloc knows the peak size but not where the peak
+# was allocated, so a snapshot is also taken after each helpers call
+# returns (when its result is still alive) and the largest one is kept
+# to attribute allocation sites.
+
+TOP = 10
+
+_largest = [0, None]  # traced bytes, snapshot
+
+
+def start(frames=1):
+    _largest[:] = [0, None]
+    tracemalloc.start(frames)
+
+def sample():
+    '''Keep a snapshot if more memory is traced now than at any earlier sample.'''
+    if not tracemalloc.is_tracing():
+        return
+    current, _ = tracemalloc.get_traced_memory()
+    if current > _largest[0]:
+        _largest[:] = [current, tracemalloc.take_snapshot()]
+
+def watch_module(module):
+    '''Sample after every public function of module returns.'''
+    for name, fn in list(vars(module).items()):
+        if name.startswith("_") or not inspect.isfunction(fn) or fn.__module__ != module.__name__:
+            continue
+        setattr(module, name, _sampled(fn))
+
+def _sampled(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        sample()
+        return result
+    return wrapper
+
+def stop(top=TOP):
+    '''Stop tracing. Returns (peak bytes, bytes at the largest sample, top sites).
+
+    Each site is (bytes, blocks, "file:line").'''
+    sample()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size, snapshot = _largest
+    if snapshot is None:
+        return peak, size, []
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    sites = [
+        (stat.size, stat.count, f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}")
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+    return peak, size, sites
@@ -0,0 +1,195 @@
+import functools
+import inspect
+import sqlite3
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import select, func, bindparam
+from .db.models import BorrowRecords
+
+# Operational metrics. Each wrapped call updates in-process counters
+# (a list per command/function, so the hot path is a few list item
+# increments); at exit they are added into a small SQLite file next to
+# the database, which is how short-lived CLI processes add up. `metrics`
+# reads that file back and appends gauges computed on the spot.
+
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)  # seconds
+
+COUNT, ERRORS, TOTAL, FIRST_BUCKET = 0, 1, 2, 3
+FIELDS = ("count", "errors", "sum") + tuple(str(b) for b in BUCKETS) + ("+Inf",)
+
+_series = {}  # (kind, name) → [count, errors, sum, per-bucket counts..., +Inf count]
+_lock = threading.Lock()
+
+# Both counts walk ix_borrow_records_open (return_date, borrow_date)
+_open_loans = select(func.count()).select_from(BorrowRecords).where(BorrowRecords.return_date.is_(None))
+_overdue_loans = _open_loans.where(BorrowRecords.borrow_date < bindparam("cutoff"))
+
+
+def state_path(db_path):
+    return f"{db_path}.metrics"
+
+def _stats(kind, name):
+    return _series.setdefault((kind, name), [0, 0, 0.0] + [0] * (len(BUCKETS) + 1))
+
+def timed(kind, name):
+    '''Decorator recording call count, errors and a latency histogram.'''
+    def decorate(fn):
+        stats = _stats(kind, name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            failed = False
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed = perf_counter() - start
+                with _lock:
+                    stats[COUNT] += 1
+                    stats[ERRORS] += failed
+                    stats[TOTAL] += elapsed
+                    stats[FIRST_BUCKET + bisect_left(BUCKETS, elapsed)] += 1
+        wrapper.__wrapped_timed__ = True
+        return wrapper
+    return decorate
+
+def instrument_module(module, kind="helper"):
+    '''Wrap every public function defined in module, in place.
+
+    Callers that look functions up through the module (helpers.borrow,
+    and helpers' own calls to its globals) go through the wrappers.'''
+    for name, fn in list(vars(module).items()):
+        if (name.startswith("_") or not inspect.isfunction(fn)
+                or fn.__module__ != module.__name__ or getattr(fn, "__wrapped_timed__", False)):
+            continue
+        setattr(module, name, timed(kind, name)(fn))
+
+def instrument_commands(group, kind="command"):
+    '''Wrap the callback of every command registered on a click group.'''
+    for name, command in group.commands.items():
+        if command.callback and not getattr(command.callback, "__wrapped_timed__", False):
+            command.callback = timed(kind, name)(command.callback)
+
+
+def flush(path):
+    '''Add this process's counters into the shared metrics file and reset them.
+
+    Metrics are best effort: if the file is locked or unwritable the
+    counts are dropped rather than failing the command that produced them.'''
+    with _lock:
+        rows = [
+            (kind, name, field, value)
+            for (kind, name), stats in _series.items() if stats[COUNT]
+            for field, value in zip(FIELDS, stats) if value
+        ]
+        for stats in _series.values():
+            stats[:] = [0, 0, 0.0] + [0] * (len(BUCKETS) + 1)
+    if not rows:
+        return
+    try:
+        conn = sqlite3.connect(path, timeout=1)
+        try:
+            with conn:
+                _create(conn)
+                conn.executemany(
+                    "INSERT INTO series (kind, name, field, value) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (kind, name, field) DO UPDATE SET value = value + excluded.value",
+                    rows,
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
+
+def _create(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS series ("
+        "kind TEXT NOT NULL, name TEXT NOT NULL, field TEXT NOT NULL, value REAL NOT NULL, "
+        "PRIMARY KEY (kind, name, field))"
+    )
+
+def load(path):
+    '''Aggregated series from the metrics file as {(kind, name): {field: value}}.'''
+    conn = sqlite3.connect(path, timeout=1)
+    try:
+        _create(conn)
+        series = {}
+        for kind, name, field, value in conn.execute("SELECT kind, name, field, value FROM series ORDER BY kind, name"):
+            series.setdefault((kind, name), {})[field] = value
+        return series
+    finally:
+        conn.close()
+
+def reset(path):
+    conn = sqlite3.connect(path, timeout=1)
+    try:
+        with conn:
+            _create(conn)
+            conn.execute("DELETE FROM series")
+    finally:
+        conn.close()
+
+
+def gauges(session, days=30):
+    '''metrics → Open loans, loans open longer than days, and database size.'''
+    # Local time, like create_borrow_record and late_returns
+    cutoff = datetime.now() - timedelta(days=days)
+    page_count = session.connection().exec_driver_sql("PRAGMA page_count").scalar()
+    page_size = session.connection().exec_driver_sql("PRAGMA page_size").scalar()
+    return {
+        "open_loans": session.scalar(_open_loans),
+        "overdue_loans": session.scalar(_overdue_loans, {"cutoff": cutoff}),
+        "database_size_bytes": page_count * page_size,
+    }
+
+
+_HISTOGRAMS = {
+    "command": ("booklib_command", "command", "CLI command"),
+    "helper": ("booklib_helper", "function", "booklib.helpers function"),
+}
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def render(series, gauge_values, days=30):
+    '''Prometheus text exposition format (version 0.0.4).'''
+    lines = []
+    for kind, (prefix, label, what) in _HISTOGRAMS.items():
+        entries = [(name, fields) for (k, name), fields in series.items() if k == kind]
+        if not entries:
+            continue
+        lines += [
+            f"# HELP {prefix}_duration_seconds Latency of each {what} call.",
+            f"# TYPE {prefix}_duration_seconds histogram",
+        ]
+        for name, fields in entries:
+            cumulative = 0
+            for field in FIELDS[FIRST_BUCKET:]:
+                cumulative += fields.get(field, 0)
+                lines.append(f'{prefix}_duration_seconds_bucket{{{label}="{name}",le="{field}"}} {_number(cumulative)}')
+            lines.append(f'{prefix}_duration_seconds_sum{{{label}="{name}"}} {_number(fields.get("sum", 0))}')
+            lines.append(f'{prefix}_duration_seconds_count{{{label}="{name}"}} {_number(fields.get("count", 0))}')
+        lines += [
+            f"# HELP {prefix}_errors_total Number of {what} calls that raised.",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        lines += [f'{prefix}_errors_total{{{label}="{name}"}} {_number(fields.get("errors", 0))}' for name, fields in entries]
+
+    lines += [
+        "# HELP booklib_open_loans Books currently on loan.",
+        "# TYPE booklib_open_loans gauge",
+        f"booklib_open_loans {gauge_values['open_loans']}",
+        f"# HELP booklib_overdue_loans Loans open for more than {days} days.",
+        "# TYPE booklib_overdue_loans gauge",
+        f'booklib_overdue_loans{{days="{days}"}} {gauge_values["overdue_loans"]}',
+        "# HELP booklib_database_size_bytes Size of the database file.",
+        "# TYPE booklib_database_size_bytes gauge",
+        f"booklib_database_size_bytes {gauge_values['database_size_bytes']}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,111 @@
+from sqlalchemy import select, func
+from .db.models import Author, Book, Borrower, BorrowRecords
+
+# Read models: plain __slots__ rows built straight from Core select() tuples.
+# They skip the identity map and attribute instrumentation of ORM objects,
+# so read-only commands only pay for the fields they actually print.
+
+
+class BookRow:
+    __slots__ = ("id", "title", "year", "genre", "available", "author_name")
+
+    def __init__(self, id, title, year, genre, available, author_name):
+        self.id = id
+        self.title = title
+        self.year = year
+        self.genre = genre
+        self.available = available
+        self.author_name = author_name
+
+    def __repr__(self):
+        return f"<BookRow(id={self.id}, title='{self.title}', available={self.available})>"
+
+
+class AuthorRow:
+    __slots__ = ("id", "name", "birth_year", "country")
+
+    def __init__(self, id, name, birth_year, country):
+        self.id = id
+        self.name = name
+        self.birth_year = birth_year
+        self.country = country
+
+    def __repr__(self):
+        return f"<AuthorRow(id={self.id}, name='{self.name}')>"
+
+
+class BorrowerRow:
+    __slots__ = ("id", "name", "contacts")
+
+    def __init__(self, id, name, contacts):
+        self.id = id
+        self.name = name
+        self.contacts = contacts
+
+    def __repr__(self):
+        return f"<BorrowerRow(id={self.id}, name='{self.name}')>"
+
+
+class LoanRow:
+    __slots__ = ("id", "book_id", "book_title", "borrower_name", "borrow_date", "return_date")
+
+    def __init__(self, id, book_id, book_title, borrower_name, borrow_date, return_date):
+        self.id = id
+        self.book_id = book_id
+        self.book_title = book_title
+        self.borrower_name = borrower_name
+        self.borrow_date = borrow_date
+        self.return_date = return_date
+
+    def __repr__(self):
+        return f"<LoanRow(id={self.id}, book_id={self.book_id}, borrower='{self.borrower_name}')>"
+
+
+# Column lists, in constructor order, for each read model
+BOOK_COLUMNS = (Book.id, Book.title, Book.year, Book.genre, Book.available, Author.name)
+AUTHOR_COLUMNS = (Author.id, Author.name, Author.birth_year, Author.country)
+BORROWER_COLUMNS = (Borrower.id, Borrower.name, Borrower.contacts)
+LOAN_COLUMNS = (
+    BorrowRecords.id,
+    BorrowRecords.book_id,
+    Book.title,
+    Borrower.name,
+    BorrowRecords.borrow_date,
+    BorrowRecords.return_date,
+)
+
+
+def book_select():
+    '''select() for BookRow, joined to the author name.'''
+    return select(*BOOK_COLUMNS).join(Author, Book.author_id == Author.id)
+
+def author_select():
+    '''select() for AuthorRow.'''
+    return select(*AUTHOR_COLUMNS)
+
+def borrower_select():
+    '''select() for BorrowerRow.'''
+    return select(*BORROWER_COLUMNS)
+
+def loan_select():
+    '''select() for LoanRow, joined to book title and borrower name.'''
+    return (
+        select(*LOAN_COLUMNS)
+        .join(Book, BorrowRecords.book_id == Book.id)
+        .join(Borrower, BorrowRecords.borrower_id == Borrower.id)
+    )
+
+
+def to_counted_rows(model, result):
+    '''Build (read model, count) pairs from tuples whose last column is a count.'''
+    return [(model(*row[:-1]), row[-1]) for row in result]
+
+def iter_rows(model, result):
+    '''Build one read model per result tuple, as the result streams in.'''
+    for row in result:
+        yield model(*row)
+
+def iter_counted_rows(model, result):
+    '''Like to_counted_rows, but lazily.'''
+    for row in result:
+        yield model(*row[:-1]), row[-1]
@@ -0,0 +1,220 @@
+import os
+
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.orm import aliased
+from .db.models import Book, BorrowRecords, BookRecommendation, Change
+from .changes import latest_cursor
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # only needed to build, not to look up
+    np = sparse = None
+
+# "Borrowers of this book also borrowed…"
+#
+# The book×book co-occurrence matrix C = XᵀX (X = borrower×book, binary)
+# is kept in a .npz file next to the database together with the last
+# borrow_records.id folded into it. New loans are added as a sparse delta,
+# loans deleted since (cascades from deleted books and borrowers, read
+# back from the change feed) are subtracted as one, and only the rows
+# they touch get their top-k neighbours rewritten in book_recommendations,
+# which serves lookups by primary key.
+
+TOP_K = 20
+
+
+def state_path(db_path):
+    return f"{db_path}.recs.npz"
+
+def _require_scipy():
+    if sparse is None:
+        raise ValueError("Building recommendations needs numpy and scipy")
+
+def _load_state(path):
+    '''(matrix, last loan id, change cursor, loans folded in); matrix is None without a usable state.'''
+    if not os.path.exists(path):
+        return None, 0, 0, 0
+    data = np.load(path)
+    if "loans" not in data.files:  # saved before deletions were tracked
+        return None, 0, 0, 0
+    matrix = sparse.csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+    return matrix, int(data["last_id"]), int(data["change_id"]), int(data["loans"])
+
+def _save_state(path, matrix, last_id, change_id, loans):
+    tmp = f"{path}.tmp.npz"
+    np.savez(tmp, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+             shape=np.array(matrix.shape), last_id=np.array(last_id),
+             change_id=np.array(change_id), loans=np.array(loans))
+    os.replace(tmp, path)
+
+def _resize(matrix, size):
+    if matrix.shape[0] >= size:
+        return matrix
+    matrix = matrix.tocoo()
+    return sparse.csr_matrix((matrix.data, (matrix.row, matrix.col)), shape=(size, size))
+
+
+def _full_matrix(session, last_id, size):
+    pairs = session.execute(
+        select(BorrowRecords.borrower_id, BorrowRecords.book_id)
+        .where(BorrowRecords.id <= last_id).distinct()
+    ).all()
+    if not pairs:
+        return sparse.csr_matrix((size, size), dtype=np.int32)
+    borrowers, books = (np.fromiter(col, dtype=np.int64, count=len(pairs)) for col in zip(*pairs))
+    _, borrower_idx = np.unique(borrowers, return_inverse=True)
+    x = sparse.csr_matrix((np.ones(len(pairs), dtype=np.int32), (borrower_idx, books)),
+                          shape=(borrower_idx.max() + 1, size))
+    matrix = (x.T @ x).tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    return matrix
+
+def _books_before(session, borrower_ids, upto):
+    '''borrower → books they borrowed in loans with id <= upto.'''
+    books = {}
+    borrower_ids = list(borrower_ids)
+    for start in range(0, len(borrower_ids), 500):
+        chunk = borrower_ids[start:start + 500]
+        for borrower_id, book_id in session.execute(
+            select(BorrowRecords.borrower_id, BorrowRecords.book_id)
+            .where(BorrowRecords.borrower_id.in_(chunk), BorrowRecords.id <= upto).distinct()
+        ):
+            books.setdefault(borrower_id, set()).add(book_id)
+    return books
+
+def _pair_matrix(changed, size):
+    '''Co-occurrence between each borrower's changed books and all their other books.
+
+    changed maps borrower → (books added or removed, books left as they were).
+    Returns (matrix, books whose rows it touches).'''
+    rows, cols = [], []
+    for books, others in changed.values():
+        for b in books:
+            for other in others:
+                rows += (b, other)
+                cols += (other, b)
+            for other in books:
+                if other != b:
+                    rows.append(b)
+                    cols.append(other)
+    touched = set(rows)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(size, size)), touched
+
+def _delta_matrix(session, since_id, last_id, size):
+    '''Co-occurrence added by loans in (since_id, last_id], and the books they touch.'''
+    new_books = {}
+    for borrower_id, book_id in session.execute(
+        select(BorrowRecords.borrower_id, BorrowRecords.book_id)
+        .where(BorrowRecords.id > since_id, BorrowRecords.id <= last_id).distinct()
+    ):
+        new_books.setdefault(borrower_id, set()).add(book_id)
+    old_books = _books_before(session, new_books, since_id)
+    changed = {}
+    for borrower_id, books in new_books.items():
+        old = old_books.get(borrower_id, set())
+        changed[borrower_id] = (books - old, old)
+    return _pair_matrix(changed, size)
+
+def _removed_matrix(session, since_id, change_id, loans, size):
+    '''Co-occurrence lost with loans <= since_id deleted after change_id, and the books it touches.
+
+    Deleting a book or borrower cascades to its loans, and the change feed
+    records each of those deletes. Returns None when the feed no longer
+    accounts for every loan that went missing (it was truncated past
+    change_id), so the caller has to rebuild.'''
+    gone = session.execute(
+        select(func.json_extract(Change.data, "$.borrower_id"), func.json_extract(Change.data, "$.book_id"))
+        .where(Change.table_name == "borrow_records", Change.op == "delete",
+               Change.id > change_id, Change.row_id <= since_id)
+    ).all()
+    remaining = session.scalar(select(func.count()).select_from(BorrowRecords).where(BorrowRecords.id <= since_id))
+    if remaining + len(gone) != loans:
+        return None
+    gone_books = {}
+    for borrower_id, book_id in gone:
+        gone_books.setdefault(borrower_id, set()).add(book_id)
+    kept_books = _books_before(session, gone_books, since_id)
+    changed = {}
+    for borrower_id, books in gone_books.items():
+        # a borrower who also has a later loan of the same book still counts it
+        kept = kept_books.get(borrower_id, set())
+        changed[borrower_id] = (books - kept, kept)
+    return _pair_matrix(changed, size)
+
+def _top_k(matrix, book_id, k):
+    start, end = matrix.indptr[book_id], matrix.indptr[book_id + 1]
+    cols, vals = matrix.indices[start:end], matrix.data[start:end]
+    if len(vals) > k:
+        keep = np.argpartition(-vals, k - 1)[:k]
+        cols, vals = cols[keep], vals[keep]
+    order = np.lexsort((cols, -vals))
+    return [(int(cols[i]), int(vals[i])) for i in order]
+
+def _write_neighbours(session, matrix, book_ids, k):
+    book_ids = sorted(book_ids)
+    for start in range(0, len(book_ids), 500):
+        chunk = book_ids[start:start + 500]
+        session.execute(delete(BookRecommendation).where(BookRecommendation.book_id.in_(chunk)))
+        rows = [
+            {"book_id": book_id, "rank": rank, "neighbour_id": neighbour, "score": score}
+            for book_id in chunk
+            for rank, (neighbour, score) in enumerate(_top_k(matrix, book_id, k), start=1)
+        ]
+        if rows:
+            session.execute(insert(BookRecommendation), rows)
+
+
+def build_recommendations(session, db_path, full=False, k=TOP_K):
+    '''build-recommendations → Fold new and deleted loans into the co-occurrence matrix and refresh top-k.
+
+    Returns (loans folded in, books whose neighbours were rewritten).'''
+    _require_scipy()
+    path = state_path(db_path)
+    matrix, since_id, since_change, loans = (None, 0, 0, 0) if full else _load_state(path)
+    change_id = latest_cursor(session)
+    last_id = session.scalar(select(func.max(BorrowRecords.id))) or 0
+    size = (session.scalar(select(func.max(Book.id))) or 0) + 1
+
+    removed = None
+    if matrix is not None:
+        matrix = _resize(matrix, size)
+        # the saved matrix can be wider than max(books.id) + 1 after deletes
+        removed = _removed_matrix(session, since_id, since_change, loans, matrix.shape[0])
+        if removed is None:
+            matrix, since_id = None, 0
+
+    if matrix is None:
+        matrix = _full_matrix(session, last_id, size)
+        touched = range(size)
+        session.execute(delete(BookRecommendation))
+    else:
+        removed, touched = removed
+        if last_id > since_id:
+            delta, added = _delta_matrix(session, since_id, last_id, matrix.shape[0])
+            matrix = matrix + delta
+            touched |= added
+        elif not touched:
+            return 0, 0
+        matrix = (matrix - removed).tocsr()
+        matrix.eliminate_zeros()
+        last_id = max(last_id, since_id)
+
+    _write_neighbours(session, matrix, touched, k)
+    session.commit()
+    loans = session.scalar(select(func.count()).select_from(BorrowRecords).where(BorrowRecords.id <= last_id))
+    _save_state(path, matrix, last_id, change_id, loans)
+    return last_id - since_id, len(touched)
+
+
+def recommend(session, book_id, number=5):
+    '''recommend <book_id> → Books most often borrowed by this book's borrowers.'''
+    neighbour = aliased(Book)
+    return session.execute(
+        select(neighbour.id, neighbour.title, BookRecommendation.score)
+        .join(neighbour, BookRecommendation.neighbour_id == neighbour.id)
+        .where(BookRecommendation.book_id == book_id)
+        .order_by(BookRecommendation.rank)
+        .limit(number)
+    ).all()
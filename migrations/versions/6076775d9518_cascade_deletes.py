@@ -0,0 +1,59 @@
+"""cascade deletes
+
+Revision ID: 6076775d9518
+Revises: dfdcbb63a11c
+Create Date: 2026-10-19 16:06:51.606571
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6076775d9518'
+down_revision: Union[str, None] = 'dfdcbb63a11c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite cannot alter foreign keys in place, so each child table is
+# rebuilt in batch mode. The naming convention gives the reflected,
+# unnamed foreign keys names that can be dropped.
+NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+FOREIGN_KEYS = {
+    "borrow_records": (("book_id", "books"), ("borrower_id", "borrowers")),
+    "holds": (("book_id", "books"), ("borrower_id", "borrowers")),
+    "book_recommendations": (("book_id", "books"), ("neighbour_id", "books")),
+}
+# Rebuilding borrow_records drops its change-feed triggers
+FEED_COLUMNS = ("id", "book_id", "borrower_id", "borrow_date", "return_date")
+
+
+def _set_ondelete(ondelete):
+    for table, keys in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, recreate="always", naming_convention=NAMING) as batch_op:
+            for column, referred in keys:
+                name = f"fk_{table}_{column}_{referred}"
+                batch_op.drop_constraint(name, type_="foreignkey")
+                batch_op.create_foreign_key(name, referred, [column], ["id"], ondelete=ondelete)
+
+    for change, ref in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+        payload = ", ".join(f"'{c}', {ref}.{c}" for c in FEED_COLUMNS)
+        op.execute(f"DROP TRIGGER IF EXISTS changes_borrow_records_{change}")
+        op.execute(
+            f"CREATE TRIGGER changes_borrow_records_{change} AFTER {change.upper()} ON borrow_records BEGIN "
+            f"INSERT INTO changes (table_name, op, row_id, data) "
+            f"VALUES ('borrow_records', '{change}', {ref}.id, json_object({payload})); END"
+        )
+
+
+def upgrade() -> None:
+    _set_ondelete("CASCADE")
+    # Cascading from books scans book_recommendations by neighbour_id
+    op.create_index(op.f('ix_book_recommendations_neighbour_id'), 'book_recommendations', ['neighbour_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_book_recommendations_neighbour_id'), table_name='book_recommendations')
+    _set_ondelete(None)
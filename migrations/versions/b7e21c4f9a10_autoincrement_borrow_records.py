@@ -0,0 +1,45 @@
+"""autoincrement borrow_records
+
+Revision ID: b7e21c4f9a10
+Revises: 3d1bfb1d718c
+Create Date: 2026-10-19 18:02:11.417203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e21c4f9a10'
+down_revision: Union[str, None] = '3d1bfb1d718c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# AUTOINCREMENT can only be set by rebuilding the table, which also
+# drops the change-feed triggers on it
+FEED_COLUMNS = ("id", "book_id", "borrower_id", "borrow_date", "return_date")
+
+
+def _rebuild(autoincrement):
+    with op.batch_alter_table("borrow_records", recreate="always",
+                              table_kwargs={"sqlite_autoincrement": autoincrement}):
+        pass
+
+    for change, ref in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+        payload = ", ".join(f"'{c}', {ref}.{c}" for c in FEED_COLUMNS)
+        op.execute(f"DROP TRIGGER IF EXISTS changes_borrow_records_{change}")
+        op.execute(
+            f"CREATE TRIGGER changes_borrow_records_{change} AFTER {change.upper()} ON borrow_records BEGIN "
+            f"INSERT INTO changes (table_name, op, row_id, data) "
+            f"VALUES ('borrow_records', '{change}', {ref}.id, json_object({payload})); END"
+        )
+
+
+def upgrade() -> None:
+    _rebuild(True)
+
+
+def downgrade() -> None:
+    _rebuild(False)
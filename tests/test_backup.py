@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+
+from booklib import backup
+
+
+def _make_db(path, rows=200):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT)")
+        conn.executemany("INSERT INTO books (title) VALUES (?)", [(f"Book {i}" * 20,) for i in range(rows)])
+    conn.close()
+
+
+def _titles(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id, title FROM books ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_compressed_backup_restores_whatever_its_name(tmp_path):
+    live, dest, target = tmp_path / "live.db", tmp_path / "backup.db", tmp_path / "target.db"
+    _make_db(live)
+    _make_db(target, rows=1)
+
+    backup.backup_database(str(live), str(dest), sleep=0, compression="gzip")
+    assert backup.detect_compression(str(dest)) == "gzip"
+    backup.restore_database(str(dest), str(target), sleep=0)
+
+    assert _titles(target) == _titles(live)
+
+
+def test_incremental_backup_rejects_a_compressed_base(tmp_path):
+    live, base = tmp_path / "live.db", tmp_path / "base.db.gz"
+    _make_db(live)
+    backup.backup_database(str(live), str(base), sleep=0, compression="gzip")
+
+    with pytest.raises(ValueError, match="uncompressed base"):
+        backup.backup_delta(str(live), str(base), str(tmp_path / "delta"), sleep=0)
+
+
+@pytest.mark.parametrize("journal_mode", ["delete", "wal"])
+def test_incremental_backup_stores_only_changed_pages(tmp_path, journal_mode):
+    live, base, delta, target = (tmp_path / name for name in ("live.db", "base.db", "delta", "target.db"))
+    _make_db(live, rows=2000)
+    conn = sqlite3.connect(live)
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.close()
+    backup.backup_database(str(live), str(base), sleep=0)
+
+    conn = sqlite3.connect(live)
+    with conn:
+        conn.execute("UPDATE books SET title = 'changed' WHERE id = 1")
+    size, _, changed = backup.backup_delta(str(live), str(base), str(delta), sleep=0, compression="gzip")
+    conn.close()
+
+    assert 0 < changed < size // 4096 // 4
+    _make_db(target, rows=1)
+    backup.restore_database(str(base), str(target), delta_path=str(delta), sleep=0)
+    assert _titles(target) == _titles(live)
+
+
+def test_incremental_backup_does_not_lock_out_writers(tmp_path):
+    live, base, delta = tmp_path / "live.db", tmp_path / "base.db", tmp_path / "delta"
+    _make_db(live, rows=2000)
+    backup.backup_database(str(live), str(base), sleep=0)
+    writes = []
+
+    def write_between_steps(done, total):
+        if not writes:
+            # No busy timeout: fails at once if the backup holds a lock
+            writer = sqlite3.connect(live, timeout=0)
+            with writer:
+                writer.execute("UPDATE books SET title = 'during' WHERE id = 1")
+            writer.close()
+            writes.append(done)
+
+    backup.backup_delta(str(live), str(base), str(delta), pages=1, sleep=0, progress=write_between_steps)
+
+    assert writes
@@ -0,0 +1,37 @@
+import pytest
+
+from booklib import dedupe
+from booklib.db.models import Author
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Mary Smith", "Mark Smith"),
+    ("John Smith", "Joan Smith"),
+    ("Jane Austen", "Jake Austen"),
+    ("Dan Brown", "Dean Brown"),
+])
+def test_different_given_names_stay_apart(a, b):
+    assert dedupe.score(dedupe.normalize(a), dedupe.normalize(b)) < 0.9
+
+
+@pytest.mark.parametrize("a, b", [
+    ("I. Asimov", "Asimov, Isaac"),
+    ("ISAAC  ASIMOV", "Isaac Asimov"),
+    ("Isaac Asimov", "Isaac Asimow"),
+])
+def test_same_person_matches(a, b):
+    assert dedupe.score(dedupe.normalize(a), dedupe.normalize(b)) >= 0.9
+
+
+def test_find_duplicates_keeps_namesakes_separate(session):
+    names = ["Mary Smith", "Mark Smith", "Dan Brown", "Dean Brown", "Isaac Asimov", "I. Asimov", "Asimov, Isaac"]
+    session.add_all(Author(name=name) for name in names)
+    session.commit()
+
+    clusters, skipped = dedupe.find_duplicates(session, threshold=0.9)
+
+    assert skipped == 0
+    assert len(clusters) == 1
+    canonical, dups = clusters[0]
+    merged = {canonical[1]} | {dup[1] for dup, _ in dups}
+    assert merged == {"Isaac Asimov", "I. Asimov", "Asimov, Isaac"}
@@ -0,0 +1,34 @@
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from booklib import federation, helpers
+from booklib.db.models import Base
+
+
+def _branch(path, books_by_author):
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        for author, count in books_by_author.items():
+            for i in range(count):
+                helpers.add_book(session, f"{author} {i}", author, 2000, "Fiction")
+    engine.dispose()
+
+
+def test_top_authors_adds_counts_across_branches(tmp_path):
+    config = {}
+    for i in range(5):
+        books = {"Spread Author": 3}
+        if i == 0:
+            books["Local Leader"] = 4
+        _branch(tmp_path / f"b{i}.db", books)
+        config[f"b{i}"] = f"b{i}.db"
+    (tmp_path / "branches.json").write_text(json.dumps(config))
+
+    branches = federation.select_branches("all", path=str(tmp_path / "branches.json"))
+    results = [(branch, rows) for branch, rows, _, error in federation.fan_out(branches, helpers.author_book_counts)
+               if not error]
+
+    assert federation.sum_ranked(results, 2) == [("Spread Author", 15, 5), ("Local Leader", 4, 1)]
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from booklib import helpers
+from booklib.db.models import Book, Hold
+
+
+@pytest.fixture
+def library(session):
+    for title in ("Dune", "Emma", "Ulysses"):
+        helpers.add_book(session, title, "Author", 2000, "Fiction")
+    for name in ("Ann", "Bob", "Carl", "Dora"):
+        helpers.add_borrower(session, name, "x")
+    return session
+
+
+def _book(session, title):
+    return session.scalars(select(Book).where(Book.title == title)).one()
+
+def _queue(session, title):
+    return [(name, assigned is not None) for _, name, _, assigned, _ in helpers.list_holds(session, title)]
+
+def _lapse(session, title, name, expires_at):
+    '''Backdate the reservation of title for name.'''
+    borrower = helpers.find_borrower(session, name)
+    session.execute(
+        update(Hold)
+        .where(Hold.book_id == _book(session, title).id, Hold.borrower_id == borrower.id)
+        .values(expires_at=expires_at)
+    )
+    session.commit()
+
+
+def test_return_reserves_the_book_for_the_first_hold(library):
+    helpers.borrow(library, "Dune", "Ann")
+    helpers.place_hold(library, "Dune", "Bob")
+    helpers.place_hold(library, "Dune", "Carl")
+
+    helpers.return_book(library, "Dune", "Ann")
+
+    assert _queue(library, "Dune") == [("Bob", True), ("Carl", False)]
+    hold = library.scalars(select(Hold).where(Hold.assigned_at.is_not(None))).one()
+    assert hold.expires_at == hold.assigned_at + timedelta(days=helpers.HOLD_DAYS)
+    assert not _book(library, "Dune").available
+
+
+def test_reserved_borrower_picks_up_the_book(library):
+    helpers.borrow(library, "Dune", "Ann")
+    helpers.place_hold(library, "Dune", "Bob")
+    helpers.return_book(library, "Dune", "Ann")
+
+    helpers.borrow(library, "Dune", "Bob")
+
+    assert _queue(library, "Dune") == []
+    assert not _book(library, "Dune").available
+    assert [r.borrower_name for r in helpers.get_borrowed_books(library, rows=True)] == ["Bob"]
+
+
+@pytest.mark.parametrize("name", ["Carl", "Dora"])
+def test_others_cannot_borrow_a_reserved_book(library, name):
+    helpers.borrow(library, "Dune", "Ann")
+    helpers.place_hold(library, "Dune", "Bob")
+    helpers.place_hold(library, "Dune", "Carl")  # waiting behind Bob
+    helpers.return_book(library, "Dune", "Ann")
+
+    with pytest.raises(ValueError, match="not available"):
+        helpers.borrow(library, "Dune", name)
+    library.rollback()
+
+    assert _queue(library, "Dune") == [("Bob", True), ("Carl", False)]
+
+
+def test_cancelling_a_reservation_passes_the_book_on(library):
+    helpers.borrow(library, "Dune", "Ann")
+    helpers.place_hold(library, "Dune", "Bob")
+    helpers.place_hold(library, "Dune", "Carl")
+    helpers.return_book(library, "Dune", "Ann")
+
+    helpers.cancel_hold(library, "Dune", "Bob")
+    assert _queue(library, "Dune") == [("Carl", True)]
+    assert not _book(library, "Dune").available
+
+    helpers.cancel_hold(library, "Dune", "Carl")
+    assert _queue(library, "Dune") == []
+    assert _book(library, "Dune").available
+
+
+def test_expiry_passes_books_on_across_batches(library):
+    # Dune and Ulysses have someone waiting behind the lapsed reservation, Emma does not
+    for title, holders in (("Dune", ("Bob", "Carl", "Dora")), ("Emma", ("Bob",)), ("Ulysses", ("Carl", "Dora"))):
+        helpers.borrow(library, title, "Ann")
+        for name in holders:
+            helpers.place_hold(library, title, name)
+        helpers.return_book(library, title, "Ann")
+    now = datetime.now()
+    # batch_size=2 puts Dune and Ulysses in the first batch and Emma in the second
+    _lapse(library, "Dune", "Bob", now - timedelta(days=3))
+    _lapse(library, "Ulysses", "Carl", now - timedelta(days=2))
+    _lapse(library, "Emma", "Bob", now - timedelta(days=1))
+
+    assert helpers.expire_holds(library, batch_size=2) == 3
+
+    assert _queue(library, "Dune") == [("Carl", True), ("Dora", False)]
+    assert _queue(library, "Emma") == []
+    assert _queue(library, "Ulysses") == [("Dora", True)]
+    assert {title: _book(library, title).available for title in ("Dune", "Emma", "Ulysses")} == {
+        "Dune": False, "Emma": True, "Ulysses": False,
+    }
+    # The new reservations run from now, so a second pass expires nothing
+    assert helpers.expire_holds(library, batch_size=2) == 0
@@ -0,0 +1,71 @@
+"""Streaming commands must not use more memory as the tables grow.
+
+Each command runs through the click CLI in a fresh subprocess against a
+synthetic booklib.db at two sizes, with stdout discarded. Peak RSS
+(ru_maxrss, which includes SQLite's page cache and other C allocations)
+is the main check, and the tracemalloc peak of the Python heap is a
+second one.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.library import build_library
+
+SMALL, LARGE = 25_000, 100_000
+MAX_RSS_GROWTH = 8 * 2**20    # bytes allowed between the small and large database
+MAX_HEAP_GROWTH = 1.5         # ratio allowed between tracemalloc peaks
+RSS_CEILING = 256 * 2**20
+
+COMMANDS = [
+    ["list-books"],
+    ["search-book", "Book"],
+    ["list-authors"],
+    ["list-borrowers"],
+    ["borrowed-books"],
+    ["late-returns", "--days", "30"],
+]
+
+# Runs one CLI command and reports its peaks on stderr
+MEASURE = """
+import json, resource, sys, tracemalloc
+from booklib.cli import cli
+tracemalloc.start()
+try:
+    cli.main(sys.argv[1:], standalone_mode=False)
+finally:
+    peak = tracemalloc.get_traced_memory()[1]
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+    sys.stderr.write("\\n" + json.dumps({"heap": peak, "rss": rss}) + "\\n")
+"""
+
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory):
+    dirs = {}
+    for rows in (SMALL, LARGE):
+        directory = tmp_path_factory.mktemp(f"library{rows}")
+        build_library(directory / "booklib.db", rows, loans=rows).dispose()
+        dirs[rows] = directory
+    return dirs
+
+
+def measure(directory, args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-c", MEASURE, *args], cwd=directory, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return json.loads(proc.stderr.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("args", COMMANDS, ids=lambda args: args[0])
+def test_peak_memory_does_not_grow_with_table_size(databases, args):
+    small = measure(databases[SMALL], args)
+    large = measure(databases[LARGE], args)
+
+    assert large["rss"] < RSS_CEILING
+    assert large["rss"] - small["rss"] < MAX_RSS_GROWTH, (small, large)
+    assert large["heap"] < small["heap"] * MAX_HEAP_GROWTH, (small, large)
@@ -0,0 +1,19 @@
+import builtins
+
+from sqlalchemy.orm import sessionmaker
+
+from booklib import cli, helpers
+
+
+def test_menu_lists_borrowed_books(engine, session, monkeypatch, capsys):
+    helpers.add_book(session, "Dune", "Frank Herbert", 1965, "Science Fiction")
+    helpers.borrow(session, "Dune", "Ann", "x")
+    monkeypatch.setattr(cli, "SessionLocal", sessionmaker(bind=engine, autoflush=False, autocommit=False))
+    choices = iter(["14", "0"])
+    monkeypatch.setattr(builtins, "input", lambda prompt="": next(choices))
+
+    cli.menu()
+
+    out = capsys.readouterr().out
+    assert "Error" not in out
+    assert "Book: Dune | Borrower: Ann | Borrowed on: " in out
@@ -0,0 +1,39 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from booklib import helpers, metrics
+from booklib.db.models import Author, Book, Borrower, BorrowRecords
+
+
+@pytest.fixture
+def non_utc_clock(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_overdue_gauge_matches_late_returns(session, non_utc_clock):
+    book = Book(title="Dune", available=False, author=Author(name="Frank Herbert"))
+    borrower = Borrower(name="Ann", contacts="x")
+    session.add_all([book, borrower])
+    session.flush()
+    now = datetime.now()
+    for age in (timedelta(days=30, hours=-2), timedelta(days=30, hours=2), timedelta(days=31)):
+        session.add(BorrowRecords(book_id=book.id, borrower_id=borrower.id, borrow_date=now - age))
+    session.commit()
+
+    gauges = metrics.gauges(session, days=30)
+
+    assert gauges["open_loans"] == 3
+    assert gauges["overdue_loans"] == len(list(helpers.late_returns(session, days=30, rows=True))) == 2
+
+
+def test_importing_the_cli_does_not_instrument_helpers():
+    import booklib.cli  # noqa: F401
+
+    assert not getattr(helpers.add_book, "__wrapped_timed__", False)
+    assert not getattr(booklib.cli.cli.commands["list-books"].callback, "__wrapped_timed__", False)
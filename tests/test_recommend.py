@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("scipy")
+
+from booklib import changes, helpers, recommend
+
+
+def _loan(session, title, borrower):
+    helpers.borrow(session, title, borrower, "x")
+    helpers.return_book(session, title, borrower)
+
+
+@pytest.fixture
+def library(session):
+    for title in ("b1", "b2", "b3", "b4"):
+        helpers.add_book(session, title, "Author", 2000, "Fiction")
+    session.commit()
+    return {book.title: book.id for book in helpers.list_books(session)}
+
+
+def test_incremental_build_after_deleting_a_book(session, library, tmp_path):
+    db_path = str(tmp_path / "library.db")
+    for title in ("b2", "b1", "b4"):
+        _loan(session, title, "Ann")
+    recommend.build_recommendations(session, db_path)
+
+    helpers.delete_book(session, library["b2"])
+    _loan(session, "b3", "Ann")
+    recommend.build_recommendations(session, db_path)
+
+    neighbours = {title for _, title, _ in recommend.recommend(session, library["b3"], 10)}
+    assert neighbours == {"b1", "b4"}
+    for title in ("b1", "b4"):
+        assert "b2" not in {t for _, t, _ in recommend.recommend(session, library[title], 10)}
+
+
+def test_incremental_build_after_deleting_the_newest_loans(session, library, tmp_path):
+    db_path = str(tmp_path / "library.db")
+    _loan(session, "b1", "Ann")
+    _loan(session, "b2", "Ann")
+    recommend.build_recommendations(session, db_path)
+
+    helpers.delete_book(session, library["b2"])  # cascades the newest loan
+    _loan(session, "b3", "Ann")
+    loans, _ = recommend.build_recommendations(session, db_path)
+
+    assert loans > 0
+    assert {title for _, title, _ in recommend.recommend(session, library["b3"], 10)} == {"b1"}
+
+
+def test_incremental_build_after_deleting_a_borrower(session, library, tmp_path):
+    db_path = str(tmp_path / "library.db")
+    _loan(session, "b1", "Ann")
+    _loan(session, "b2", "Ann")
+    recommend.build_recommendations(session, db_path)
+
+    helpers.delete_borrower(session, helpers.find_borrower(session, "Ann").id)  # cascades her loans
+    _loan(session, "b3", "Bob")
+    recommend.build_recommendations(session, db_path)
+
+    assert recommend.recommend(session, library["b1"], 10) == []
+    assert recommend.recommend(session, library["b2"], 10) == []
+
+
+def test_incremental_build_rebuilds_when_the_change_feed_was_truncated(session, library, tmp_path):
+    db_path = str(tmp_path / "library.db")
+    _loan(session, "b1", "Ann")
+    _loan(session, "b2", "Ann")
+    _loan(session, "b1", "Bob")
+    _loan(session, "b3", "Bob")
+    recommend.build_recommendations(session, db_path)
+
+    helpers.delete_borrower(session, helpers.find_borrower(session, "Ann").id)
+    changes.truncate_changes(session)
+    recommend.build_recommendations(session, db_path)
+
+    assert [title for _, title, _ in recommend.recommend(session, library["b1"], 10)] == ["b3"]
+    assert recommend.recommend(session, library["b2"], 10) == []
@@ -0,0 +1,25 @@
+import builtins
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from booklib import cli
+from booklib.db.models import Base
+from booklib.db.replica import Replica
+
+
+def test_menu_reloads_replica_only_for_reads(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "booklib.db"
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(cli, "SessionLocal", sessionmaker(bind=engine, autoflush=False, autocommit=False))
+    replica = Replica(str(path))
+    choices = iter(["9", "Ann", "x", "9", "Bob", "x", "10", "0"])  # two writes, then a read
+    monkeypatch.setattr(builtins, "input", lambda prompt="": next(choices))
+
+    cli.menu(replica)
+    replica.close()
+    engine.dispose()
+
+    assert replica.reloads == 2  # at startup, then once for the read after both writes
+    assert "Bob (x)" in capsys.readouterr().out